@@ -20,7 +20,14 @@ from rollgate.circuit_breaker import (
     CircuitState,
 )
 from rollgate.retry import RetryConfig, calculate_backoff, is_retryable_error
-from rollgate.cache import CacheConfig, CacheStats, FlagCache
+from rollgate.cache import (
+    CacheConfig,
+    CacheStats,
+    CacheStorage,
+    FileStorage,
+    FlagCache,
+    InMemoryStorage,
+)
 from rollgate.errors import (
     RollgateError,
     AuthenticationError,
@@ -43,6 +50,7 @@ from rollgate.tracing import (
     TraceContext,
     RequestTrace,
     TracingManager,
+    current_context,
     get_tracer,
     create_tracer,
 )
@@ -87,7 +95,10 @@ __all__ = [
     # Cache
     "CacheConfig",
     "CacheStats",
+    "CacheStorage",
+    "FileStorage",
     "FlagCache",
+    "InMemoryStorage",
     # Errors
     "RollgateError",
     "AuthenticationError",
@@ -110,6 +121,7 @@ __all__ = [
     "TraceContext",
     "RequestTrace",
     "TracingManager",
+    "current_context",
     "get_tracer",
     "create_tracer",
     # Evaluation
@@ -0,0 +1,9 @@
+"""
+Compatibility helpers for older Python versions.
+"""
+
+import sys
+from typing import Any, Dict
+
+DATACLASS_SLOTS: Dict[str, Any] = {"slots": True} if sys.version_info >= (3, 10) else {}
+"""Keyword arguments enabling ``__slots__`` on dataclasses where supported (3.10+)."""
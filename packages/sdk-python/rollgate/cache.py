@@ -6,7 +6,50 @@ import json
 import time
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Optional, Callable, Dict, Any
+from typing import Optional, Callable, Dict, Any, Protocol
+
+from ._compat import DATACLASS_SLOTS
+
+
+class CacheStorage(Protocol):
+    """Backend that holds the serialized cache between runs."""
+
+    def read(self) -> Optional[str]:
+        """Return the stored payload, or None if nothing is stored."""
+        ...
+
+    def write(self, data: str) -> None:
+        """Replace the stored payload."""
+        ...
+
+
+class FileStorage:
+    """Stores the cache payload in a file on disk."""
+
+    def __init__(self, path: str):
+        self._path = Path(path)
+
+    def read(self) -> Optional[str]:
+        if not self._path.exists():
+            return None
+        return self._path.read_text()
+
+    def write(self, data: str) -> None:
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+        self._path.write_text(data)
+
+
+class InMemoryStorage:
+    """Keeps the cache payload in memory. Useful for tests."""
+
+    def __init__(self, data: Optional[str] = None):
+        self.data = data
+
+    def read(self) -> Optional[str]:
+        return self.data
+
+    def write(self, data: str) -> None:
+        self.data = data
 
 
 @dataclass
@@ -22,10 +65,16 @@ class CacheConfig:
     persist_path: Optional[str] = None
     """File path for persistent cache."""
 
+    storage: Optional[CacheStorage] = None
+    """Custom persistence backend. Takes precedence over persist_path."""
 
-@dataclass
+    time_source: Callable[[], float] = time.time
+    """Clock returning seconds. Wall-clock by default since timestamps are persisted."""
+
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class CacheStats:
-    """Cache statistics."""
+    """Cache statistics snapshot."""
 
     hits: int = 0
     misses: int = 0
@@ -60,14 +109,22 @@ class FlagCache:
     Features:
     - In-memory caching with configurable TTL
     - Stale-while-revalidate pattern
-    - File persistence
+    - Pluggable persistence (file by default)
     - Event callbacks for cache state changes
     """
 
     def __init__(self, config: Optional[CacheConfig] = None):
         self._config = config or DEFAULT_CACHE_CONFIG
+        self._now = self._config.time_source
+        self._storage: Optional[CacheStorage] = self._config.storage
+        if self._storage is None and self._config.persist_path:
+            self._storage = FileStorage(self._config.persist_path)
         self._cache: Dict[str, CacheEntry] = {}
-        self._stats = CacheStats()
+        # Plain int counters: increments and reads need no lock, and
+        # get_stats() copies them out without touching the entries.
+        self._hits = 0
+        self._misses = 0
+        self._stale_hits = 0
         self._callbacks: Dict[str, list[Callable]] = {
             "cache_hit": [],
             "cache_miss": [],
@@ -107,29 +164,28 @@ class FlagCache:
         entry = self._cache.get(key)
 
         if entry is None:
-            self._stats.misses += 1
+            self._misses += 1
             self._emit("cache_miss", key)
             return None
 
-        age_ms = (time.time() - entry.timestamp) * 1000
+        age_ms = (self._now() - entry.timestamp) * 1000
 
         # Fresh cache
         if age_ms < self._config.ttl_ms:
-            self._stats.hits += 1
+            self._hits += 1
             self._emit("cache_hit", key, False, age_ms)
             return CacheResult(flags=entry.value, stale=False)
 
         # Stale but usable
         if age_ms < self._config.stale_ttl_ms:
-            self._stats.stale_hits += 1
+            self._stale_hits += 1
             self._emit("cache_hit", key, True, age_ms)
             self._emit("cache_stale", key, age_ms)
             return CacheResult(flags=entry.value, stale=True)
 
         # Expired - remove from cache
         del self._cache[key]
-        self._stats.size = len(self._cache)
-        self._stats.misses += 1
+        self._misses += 1
         self._emit("cache_expired", key, age_ms)
         return None
 
@@ -143,12 +199,11 @@ class FlagCache:
         """
         entry = CacheEntry(
             value=flags,
-            timestamp=time.time(),
+            timestamp=self._now(),
             stale=False,
         )
 
         self._cache[key] = entry
-        self._stats.size = len(self._cache)
         self._emit("cache_set", key, len(flags))
 
         # Persist if configured
@@ -159,7 +214,7 @@ class FlagCache:
         entry = self._cache.get(key)
         if entry is None:
             return False
-        age_ms = (time.time() - entry.timestamp) * 1000
+        age_ms = (self._now() - entry.timestamp) * 1000
         return age_ms < self._config.ttl_ms
 
     def has_any(self, key: str = "flags") -> bool:
@@ -167,29 +222,29 @@ class FlagCache:
         entry = self._cache.get(key)
         if entry is None:
             return False
-        age_ms = (time.time() - entry.timestamp) * 1000
+        age_ms = (self._now() - entry.timestamp) * 1000
         return age_ms < self._config.stale_ttl_ms
 
     def clear(self) -> None:
         """Clear all cached data."""
         self._cache.clear()
-        self._stats.size = 0
 
     def get_stats(self) -> CacheStats:
         """Get cache statistics."""
         return CacheStats(
-            hits=self._stats.hits,
-            misses=self._stats.misses,
-            stale_hits=self._stats.stale_hits,
-            size=self._stats.size,
+            hits=self._hits,
+            misses=self._misses,
+            stale_hits=self._stale_hits,
+            size=len(self._cache),
         )
 
     def get_hit_rate(self) -> float:
         """Get hit rate (hits / (hits + misses))."""
-        total = self._stats.hits + self._stats.stale_hits + self._stats.misses
+        served = self._hits + self._stale_hits
+        total = served + self._misses
         if total == 0:
             return 0.0
-        return (self._stats.hits + self._stats.stale_hits) / total
+        return served / total
 
     def load(self) -> bool:
         """
@@ -198,20 +253,20 @@ class FlagCache:
         Returns:
             True if cache was loaded successfully
         """
-        if not self._config.persist_path:
+        if self._storage is None:
             return False
 
         try:
-            path = Path(self._config.persist_path)
-            if not path.exists():
+            raw = self._storage.read()
+            if raw is None:
                 return False
 
-            data = json.loads(path.read_text())
+            data = json.loads(raw)
             entries = data.get("entries", [])
 
             for key, entry_data in entries:
                 timestamp = entry_data.get("timestamp", 0)
-                age_ms = (time.time() - timestamp) * 1000
+                age_ms = (self._now() - timestamp) * 1000
 
                 # Only restore if within stale TTL
                 if age_ms < self._config.stale_ttl_ms:
@@ -221,7 +276,6 @@ class FlagCache:
                         stale=age_ms >= self._config.ttl_ms,
                     )
 
-            self._stats.size = len(self._cache)
             return True
         except Exception:
             return False
@@ -233,7 +287,7 @@ class FlagCache:
         Returns:
             True if cache was persisted successfully
         """
-        if not self._config.persist_path:
+        if self._storage is None:
             return False
 
         try:
@@ -244,16 +298,14 @@ class FlagCache:
                     for key, entry in self._cache.items()
                 ],
             }
-            path = Path(self._config.persist_path)
-            path.parent.mkdir(parents=True, exist_ok=True)
-            path.write_text(json.dumps(data))
+            self._storage.write(json.dumps(data))
             return True
         except Exception:
             return False
 
     def close(self) -> None:
         """Cleanup resources and final persist."""
-        if self._config.persist_path:
+        if self._storage is not None:
             self._persist()
         # Clear all callbacks to prevent memory leaks
         for event in self._callbacks:
@@ -9,6 +9,8 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Callable, TypeVar, Optional, Awaitable, List
 
+from ._compat import DATACLASS_SLOTS
+
 T = TypeVar("T")
 
 
@@ -41,8 +43,11 @@ class CircuitBreakerConfig:
     success_threshold: int = 3
     """Number of successful requests in half-open to close circuit."""
 
+    time_source: Callable[[], float] = time.time
+    """Clock returning seconds. Wall-clock by default so last_failure_time is an epoch."""
 
-@dataclass
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class CircuitBreakerStats:
     """Statistics about circuit breaker state."""
 
@@ -75,6 +80,7 @@ class CircuitBreaker:
 
     def __init__(self, config: Optional[CircuitBreakerConfig] = None):
         self._config = config or DEFAULT_CIRCUIT_BREAKER_CONFIG
+        self._now = self._config.time_source
         self._state = CircuitState.CLOSED
         self._failures: List[float] = []
         self._last_failure_time: float = 0
@@ -150,12 +156,14 @@ class CircuitBreaker:
             if self._half_open_successes >= self._config.success_threshold:
                 self._reset()
 
-        # Clean up old failures outside monitoring window
-        self._cleanup_old_failures()
+        # Clean up old failures outside monitoring window. The common case
+        # (healthy service, no recorded failures) skips the list rebuild.
+        if self._failures:
+            self._cleanup_old_failures()
 
     def _on_failure(self) -> None:
         """Handle failed request."""
-        now = time.time() * 1000  # Convert to ms
+        now = self._now() * 1000  # Convert to ms
         self._failures.append(now)
         self._last_failure_time = now
 
@@ -173,17 +181,17 @@ class CircuitBreaker:
 
     def _cleanup_old_failures(self) -> None:
         """Remove failures outside the monitoring window."""
-        cutoff = time.time() * 1000 - self._config.monitoring_window_ms
+        cutoff = self._now() * 1000 - self._config.monitoring_window_ms
         self._failures = [t for t in self._failures if t > cutoff]
 
     def _should_attempt_reset(self) -> bool:
         """Check if enough time has passed to attempt reset."""
-        elapsed = time.time() * 1000 - self._last_failure_time
+        elapsed = self._now() * 1000 - self._last_failure_time
         return elapsed >= self._config.recovery_timeout_ms
 
     def _get_time_until_retry(self) -> int:
         """Get time until next retry attempt is allowed."""
-        elapsed = time.time() * 1000 - self._last_failure_time
+        elapsed = self._now() * 1000 - self._last_failure_time
         return max(0, int(self._config.recovery_timeout_ms - elapsed))
 
     def _transition_to(self, new_state: CircuitState) -> None:
@@ -212,7 +220,7 @@ class CircuitBreaker:
 
     def force_open(self) -> None:
         """Force open the circuit breaker (for testing/manual circuit trip)."""
-        self._last_failure_time = time.time() * 1000
+        self._last_failure_time = self._now() * 1000
         self._transition_to(CircuitState.OPEN)
 
     @property
@@ -29,6 +29,7 @@ from rollgate.errors import (
     AuthenticationError,
     NetworkError,
     RateLimitError,
+    InternalError,
     classify_error,
 )
 from rollgate.events import EventCollector, EventCollectorConfig, TrackEventOptions
@@ -84,6 +85,9 @@ class RollgateConfig:
     cache: CacheConfig = field(default_factory=lambda: DEFAULT_CACHE_CONFIG)
     """Cache configuration."""
 
+    transport: Optional[httpx.AsyncBaseTransport] = None
+    """Custom httpx transport for the SDK's own clients (e.g. httpx.MockTransport in tests)."""
+
 
 class RollgateClient:
     """
@@ -128,6 +132,7 @@ class RollgateClient:
             self._owns_http_client = False
         else:
             self._http_client = httpx.AsyncClient(
+                transport=config.transport,
                 timeout=config.timeout_ms / 1000,
                 limits=httpx.Limits(
                     max_connections=10,
@@ -145,6 +150,9 @@ class RollgateClient:
         )
 
         from .telemetry import TelemetryCollector, TelemetryConfig as TelemetryConfigClass
+
+        # Built in init(), so a client that is never started opens no extra pool
+        self._telemetry_http_client: Optional[httpx.AsyncClient] = None
         self._telemetry_collector = TelemetryCollector(
             endpoint=f"{config.base_url}/api/v1/sdk/telemetry",
             api_key=config.api_key,
@@ -235,7 +243,15 @@ class RollgateClient:
             self._poll_task = asyncio.create_task(self._start_polling())
 
         self._event_collector.start()
-        self._telemetry_collector.start()
+        # Telemetry gets its own long-lived connection unless the caller
+        # supplied a client, in which case we reuse theirs.
+        if self._owns_http_client and self._telemetry_http_client is None:
+            from .telemetry import build_telemetry_client
+
+            self._telemetry_http_client = build_telemetry_client(
+                self._config.timeout_ms / 1000, transport=self._config.transport
+            )
+        self._telemetry_collector.start(http_client=self._telemetry_http_client)
         self._emit("ready")
 
     async def _start_polling(self) -> None:
@@ -350,10 +366,14 @@ class RollgateClient:
         if self._last_etag:
             headers["If-None-Match"] = self._last_etag
 
-        response = await self._http_client.get(
-            url, params=params, headers=headers,
-            timeout=self._config.timeout_ms / 1000,
-        )
+        try:
+            response = await self._http_client.get(
+                url, params=params, headers=headers,
+                timeout=self._config.timeout_ms / 1000,
+            )
+        except httpx.TransportError as e:
+            # Typed at the source so retry never has to parse the message
+            raise NetworkError(str(e) or type(e).__name__) from e
 
         # Handle 304 Not Modified
         if response.status_code == 304:
@@ -374,10 +394,9 @@ class RollgateClient:
             )
 
         if response.status_code >= 500:
-            raise RollgateError(
+            raise InternalError(
                 f"Server error: {response.status_code}",
-                status_code=response.status_code,
-                retryable=True,
+                response.status_code,
             )
 
         if not response.is_success:
@@ -582,9 +601,11 @@ class RollgateClient:
             except asyncio.CancelledError:
                 pass
 
-        # Close HTTP client only if we own it
+        # Close HTTP clients only if we own them
         if self._owns_http_client and self._http_client:
             await self._http_client.aclose()
+        if self._telemetry_http_client:
+            await self._telemetry_http_client.aclose()
 
         # Close cache (also clears its callbacks)
         self._cache.close()
@@ -20,6 +20,9 @@ class DedupConfig:
     ttl_ms: int = 5000
     """Time-to-live for inflight request tracking (default: 5s)."""
 
+    time_source: Callable[[], float] = time.monotonic
+    """Clock returning seconds, used for TTL expiry."""
+
 
 DEFAULT_DEDUP_CONFIG = DedupConfig()
 
@@ -60,6 +63,7 @@ class RequestDeduplicator:
             config: Deduplication configuration
         """
         self._config = config
+        self._now = config.time_source
         self._inflight: Dict[str, InflightRequest] = {}
         self._lock = asyncio.Lock()
 
@@ -106,7 +110,7 @@ class RequestDeduplicator:
             future: asyncio.Future = loop.create_future()
             self._inflight[key] = InflightRequest(
                 future=future,
-                timestamp=time.time(),
+                timestamp=self._now(),
                 key=key,
             )
 
@@ -130,7 +134,7 @@ class RequestDeduplicator:
 
     def _cleanup_expired(self) -> None:
         """Remove expired inflight requests."""
-        now = time.time()
+        now = self._now()
         ttl_seconds = self._config.ttl_ms / 1000
         expired_keys = [
             key
@@ -3,13 +3,30 @@ Client-side flag evaluation logic.
 Mirrors the server-side evaluation for consistency.
 """
 
+import contextlib
 import hashlib
+import json
 import re
+from collections import OrderedDict
+from functools import lru_cache
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any, Union
+from typing import (
+    Any, Callable, Dict, FrozenSet, Optional, Sequence, Set, Tuple, Union,
+)
 
+from ._compat import DATACLASS_SLOTS
 
-@dataclass
+try:
+    import re2  # type: ignore[import-not-found, unused-ignore]
+except ImportError:
+    re2 = None
+
+if re2 is not None:
+    _RE2_OPTIONS = re2.Options()
+    _RE2_OPTIONS.log_errors = False  # rejected patterns fall back to re quietly
+
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class Condition:
     """Represents a targeting condition."""
     attribute: str
@@ -17,34 +34,64 @@ class Condition:
     value: str
 
 
-@dataclass
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class TargetingRule:
-    """Represents a targeting rule with conditions."""
+    """
+    Represents a targeting rule with conditions.
+
+    Immutable (conditions are stored as a tuple) so the compiled form built
+    at construction cannot drift from the fields.
+    """
     id: str
     enabled: bool
     rollout: int
-    conditions: List[Condition] = field(default_factory=list)
+    conditions: Sequence[Condition] = ()
     name: Optional[str] = None
+    _compiled: Tuple["_CompiledCondition", ...] = field(
+        init=False, repr=False, compare=False, default=()
+    )
+
+    def __post_init__(self) -> None:
+        conditions = tuple(self.conditions)
+        object.__setattr__(self, "conditions", conditions)
+        # Flattened once so matching skips per-evaluation attribute and
+        # operator lookups on the Condition objects
+        object.__setattr__(self, "_compiled", tuple(map(_compile_condition, conditions)))
 
 
-@dataclass
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class FlagRule:
-    """Represents a feature flag with targeting rules."""
+    """
+    Represents a feature flag with targeting rules.
+
+    Immutable (sequences are stored as tuples) so the target user index
+    built at construction cannot drift from the fields.
+    """
     key: str
     enabled: bool
     rollout: int
-    target_users: List[str] = field(default_factory=list)
-    rules: List[TargetingRule] = field(default_factory=list)
+    target_users: Sequence[str] = ()
+    rules: Sequence[TargetingRule] = ()
+    _target_user_set: FrozenSet[str] = field(
+        init=False, repr=False, compare=False, default=frozenset()
+    )
+
+    def __post_init__(self) -> None:
+        target_users = tuple(self.target_users)
+        object.__setattr__(self, "target_users", target_users)
+        object.__setattr__(self, "rules", tuple(self.rules))
+        # Indexed once so targeting checks are O(1) regardless of list size
+        object.__setattr__(self, "_target_user_set", frozenset(target_users))
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class RulesPayload:
     """Represents the rules response from the API."""
     version: str
     flags: Dict[str, FlagRule] = field(default_factory=dict)
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class EvaluationResult:
     """Represents the result of a flag evaluation."""
     enabled: bool
@@ -52,7 +99,7 @@ class EvaluationResult:
     variation_id: Optional[str] = None
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class UserContext:
     """User context for targeting."""
     id: str
@@ -76,7 +123,7 @@ def evaluate_flag(rule: FlagRule, user: Optional[UserContext]) -> bool:
 
     # 2. Check if user is in target list
     if user and user.id and rule.target_users:
-        if user.id in rule.target_users:
+        if user.id in rule._target_user_set:
             return True
 
     # 3. Check targeting rules
@@ -106,72 +153,100 @@ def _matches_rule(rule: TargetingRule, user: UserContext) -> bool:
     Check if a user matches a targeting rule.
     All conditions within a rule must match (AND logic).
     """
-    if not rule.conditions:
+    if not rule._compiled:
         return False
 
-    for condition in rule.conditions:
-        if not _matches_condition(condition, user):
+    for attribute, operator, compare, cond_value in rule._compiled:
+        attr_value = _get_attribute_value(attribute, user)
+        exists = attr_value is not None and str(attr_value) != ""
+
+        # Handle is_set / is_not_set operators first
+        if operator == "is_set":
+            matched = exists
+        elif operator == "is_not_set":
+            matched = not exists
+        # For other operators, if attribute doesn't exist, condition fails
+        elif not exists or compare is None:
+            matched = False
+        else:
+            matched = compare(attr_value, str(attr_value).lower(), cond_value)
+
+        if not matched:
             return False
     return True
 
 
-def _matches_condition(condition: Condition, user: UserContext) -> bool:
-    """Check if a user matches a single condition."""
-    attr_value = _get_attribute_value(condition.attribute, user)
-    exists = attr_value is not None and str(attr_value) != ""
+# (attribute, operator, comparison fn or None, condition value)
+_CompiledCondition = Tuple[str, str, Optional[Callable[[Any, str, str], bool]], str]
+
 
-    # Handle is_set / is_not_set operators first
-    if condition.operator == "is_set":
-        return exists
-    if condition.operator == "is_not_set":
-        return not exists
+def _compile_condition(condition: Condition) -> _CompiledCondition:
+    """Resolve a condition's operator to its comparison function."""
+    return (
+        condition.attribute,
+        condition.operator,
+        _OPERATORS.get(condition.operator),
+        condition.value,
+    )
 
-    # For other operators, if attribute doesn't exist, condition fails
-    if not exists:
+
+def _matches_regex(attr_value: Any, pattern: str) -> bool:
+    try:
+        return bool(_compiled_regex(pattern).match(str(attr_value)))
+    except re.error:
         return False
 
-    value = str(attr_value).lower()
-    cond_value = condition.value.lower()
-
-    if condition.operator == "equals":
-        return value == cond_value
-    elif condition.operator == "not_equals":
-        return value != cond_value
-    elif condition.operator == "contains":
-        return cond_value in value
-    elif condition.operator == "not_contains":
-        return cond_value not in value
-    elif condition.operator == "starts_with":
-        return value.startswith(cond_value)
-    elif condition.operator == "ends_with":
-        return value.endswith(cond_value)
-    elif condition.operator == "in":
-        values = [v.strip().lower() for v in condition.value.split(",")]
-        return value in values
-    elif condition.operator == "not_in":
-        values = [v.strip().lower() for v in condition.value.split(",")]
-        return value not in values
-    elif condition.operator == "greater_than":
-        return _compare_numeric(attr_value, condition.value, ">")
-    elif condition.operator == "greater_equal":
-        return _compare_numeric(attr_value, condition.value, ">=")
-    elif condition.operator == "less_than":
-        return _compare_numeric(attr_value, condition.value, "<")
-    elif condition.operator == "less_equal":
-        return _compare_numeric(attr_value, condition.value, "<=")
-    elif condition.operator == "regex":
+
+@lru_cache(maxsize=1024)
+def _value_set(raw: str) -> FrozenSet[str]:
+    """Parse a comma-separated in/not_in value list once per distinct string."""
+    return frozenset(v.strip().lower() for v in raw.split(","))
+
+
+# operator -> fn(raw attribute value, lowercased attribute value, condition value)
+_OPERATORS: Dict[str, Callable[[Any, str, str], bool]] = {
+    "equals": lambda raw, value, cond: value == cond.lower(),
+    "not_equals": lambda raw, value, cond: value != cond.lower(),
+    "contains": lambda raw, value, cond: cond.lower() in value,
+    "not_contains": lambda raw, value, cond: cond.lower() not in value,
+    "starts_with": lambda raw, value, cond: value.startswith(cond.lower()),
+    "ends_with": lambda raw, value, cond: value.endswith(cond.lower()),
+    "in": lambda raw, value, cond: value in _value_set(cond),
+    "not_in": lambda raw, value, cond: value not in _value_set(cond),
+    "greater_than": lambda raw, value, cond: _compare_numeric(raw, cond, ">"),
+    "greater_equal": lambda raw, value, cond: _compare_numeric(raw, cond, ">="),
+    "less_than": lambda raw, value, cond: _compare_numeric(raw, cond, "<"),
+    "less_equal": lambda raw, value, cond: _compare_numeric(raw, cond, "<="),
+    "regex": lambda raw, value, cond: _matches_regex(raw, cond),
+    "semver_gt": lambda raw, value, cond: _compare_semver(str(raw), cond, ">"),
+    "semver_lt": lambda raw, value, cond: _compare_semver(str(raw), cond, "<"),
+    "semver_eq": lambda raw, value, cond: _compare_semver(str(raw), cond, "="),
+}
+
+
+@lru_cache(maxsize=1024)
+def _compiled_regex(pattern: str) -> Any:
+    """
+    Compile a regex condition value once per distinct pattern.
+
+    Uses RE2 (linear-time, no backtracking) when the optional ``google-re2``
+    package is installed. Patterns RE2 does not support, such as
+    backreferences, fall back to ``re``.
+    """
+    if re2 is not None:
         try:
-            return bool(re.match(condition.value, str(attr_value)))
-        except re.error:
-            return False
-    elif condition.operator == "semver_gt":
-        return _compare_semver(str(attr_value), condition.value, ">")
-    elif condition.operator == "semver_lt":
-        return _compare_semver(str(attr_value), condition.value, "<")
-    elif condition.operator == "semver_eq":
-        return _compare_semver(str(attr_value), condition.value, "=")
-    else:
-        return False
+            return re2.compile(pattern, _RE2_OPTIONS)
+        except re2.error:
+            pass
+    return re.compile(pattern)
+
+
+def clear_rule_caches() -> None:
+    """Drop cached regexes, value sets and versions derived from previous rules."""
+    _compiled_regex.cache_clear()
+    _value_set.cache_clear()
+    _parse_version.cache_clear()
+    _flag_hasher.cache_clear()
 
 
 def _get_attribute_value(attribute: str, user: UserContext) -> Any:
@@ -214,33 +289,53 @@ def _compare_semver(attr_val: str, cond_val: str, op: str) -> bool:
     if a is None or b is None:
         return False
 
-    # Pad lists to same length
-    while len(a) < len(b):
-        a.append(0)
-    while len(b) < len(a):
-        b.append(0)
-
-    # Compare each part
-    for i in range(len(a)):
-        if a[i] > b[i]:
-            return op in (">", ">=")
-        if a[i] < b[i]:
-            return op in ("<", "<=")
+    # Pad to same length so "1.2" == "1.2.0"
+    if len(a) < len(b):
+        a += (0,) * (len(b) - len(a))
+    elif len(b) < len(a):
+        b += (0,) * (len(a) - len(b))
 
-    # Equal
+    if a > b:
+        return op in (">", ">=")
+    if a < b:
+        return op in ("<", "<=")
     return op in ("=", ">=", "<=")
 
 
-def _parse_version(v: str) -> Optional[List[int]]:
-    """Parse a semantic version string."""
+@lru_cache(maxsize=4096)
+def _parse_version(v: str) -> Optional[Tuple[int, ...]]:
+    """Parse a semantic version string once per distinct value."""
     clean = v.lstrip("v")
     parts = clean.split(".")
     try:
-        return [int(p) for p in parts]
+        return tuple(int(p) for p in parts)
     except ValueError:
         return None
 
 
+_sha256 = hashlib.sha256
+_from_bytes = int.from_bytes
+
+
+def _rollout_bucket(flag_key: str, user_id: str) -> int:
+    """
+    Map flagKey:userId to a bucket in 0-99.
+
+    Uses the first 4 bytes of the SHA-256 digest as a big-endian uint32,
+    mod 100. This must stay identical to the server and the other SDKs, or
+    the same user would land in different rollout buckets per platform.
+    """
+    hasher = _flag_hasher(flag_key).copy()
+    hasher.update(user_id.encode("utf-8"))
+    return _from_bytes(hasher.digest()[:4], "big") % 100
+
+
+@lru_cache(maxsize=1024)
+def _flag_hasher(flag_key: str) -> "hashlib._Hash":
+    """SHA-256 state already fed "flagKey:", shared by every user of a flag."""
+    return _sha256(f"{flag_key}:".encode("utf-8"))
+
+
 def _is_in_rollout(flag_key: str, user_id: str, percentage: int) -> bool:
     """
     Consistent hashing for rollout percentage.
@@ -248,11 +343,7 @@ def _is_in_rollout(flag_key: str, user_id: str, percentage: int) -> bool:
     - Same user always gets same result for a given flag
     - Distribution is statistically uniform
     """
-    hash_input = f"{flag_key}:{user_id}".encode("utf-8")
-    hash_bytes = hashlib.sha256(hash_input).digest()
-    # Use first 4 bytes as uint32 and mod 100 to get a value 0-99
-    value = int.from_bytes(hash_bytes[:4], byteorder="big") % 100
-    return value < percentage
+    return _rollout_bucket(flag_key, user_id) < percentage
 
 
 def evaluate_all_flags(
@@ -263,6 +354,59 @@ def evaluate_all_flags(
     return {key: evaluate_flag(rule, user) for key, rule in rules.items()}
 
 
+EVAL_CACHE_SIZE = 10000
+"""Maximum number of memoized (flag_key, user_id) results per LocalEvaluator."""
+
+
+def _depends_only_on_user_id(rule: FlagRule) -> bool:
+    """True if the flag's result is a function of the user id alone."""
+    return all(
+        condition.attribute == "id"
+        for targeting_rule in rule.rules
+        if targeting_rule.enabled
+        for condition in targeting_rule.conditions
+    )
+
+
+def _constant_result(rule: FlagRule) -> Optional[bool]:
+    """The flag's result if it is the same for every user, else None."""
+    if not rule.enabled:
+        return False
+    if any(targeting_rule.enabled for targeting_rule in rule.rules):
+        return None
+    if rule.rollout >= 100:
+        return True
+    if rule.rollout <= 0 and not rule.target_users:
+        return False
+    return None
+
+
+@dataclass(**DATACLASS_SLOTS)
+class _RuleSet:
+    """Installed rules plus everything derived from them, swapped in as one unit."""
+    version: str
+    flags: Dict[str, FlagRule]
+    constants: Dict[str, bool]
+    """Flags whose result is user-independent."""
+    memoizable: FrozenSet[str]
+    """Flags whose result depends only on user id."""
+    cache: "OrderedDict[Tuple[str, str], bool]"
+    """Memoized (flag_key, user_id) results for memoizable flags."""
+
+
+def _build_rule_set(version: str, flags: Dict[str, FlagRule]) -> _RuleSet:
+    """Derive constants and memoizable flags for a new set of rules."""
+    constants: Dict[str, bool] = {}
+    memoizable: Set[str] = set()
+    for key, rule in flags.items():
+        constant = _constant_result(rule)
+        if constant is not None:
+            constants[key] = constant
+        elif _depends_only_on_user_id(rule):
+            memoizable.add(key)
+    return _RuleSet(version, flags, constants, frozenset(memoizable), OrderedDict())
+
+
 class LocalEvaluator:
     """
     Local evaluator for client-side flag evaluation.
@@ -279,18 +423,51 @@ class LocalEvaluator:
 
     def __init__(self):
         """Initialize the local evaluator."""
-        self._rules: Dict[str, FlagRule] = {}
-        self._version: str = ""
+        # Rules and their derived state (constants, memoized results for
+        # flags that depend only on user id) are replaced together by a
+        # single assignment, so a concurrent evaluate() sees either the old
+        # set or the new one, never a half-cleared mix.
+        self._state = _build_rule_set("", {})
+        # Serialized form of the last payload, so unchanged polls are no-ops
+        self._payload_key: Optional[Union[str, bytes]] = None
+
+    def _install_rules(self, version: str, flags: Dict[str, FlagRule]) -> None:
+        """Swap in new rules, dropping everything derived from the previous ones."""
+        clear_rule_caches()
+        self._state = _build_rule_set(version, flags)
 
     def set_rules(self, payload: RulesPayload) -> None:
         """Set the rules for local evaluation."""
-        self._rules = payload.flags
-        self._version = payload.version
+        self._payload_key = None
+        # Copied so later changes to payload.flags cannot drift from the
+        # constants and memoized results derived from it here
+        self._install_rules(payload.version, dict(payload.flags))
+
+    def set_rules_from_bytes(self, raw: bytes) -> None:
+        """
+        Set rules from a raw JSON response body.
+
+        A body identical to the previous one is ignored without parsing.
+
+        Args:
+            raw: UTF-8 encoded rules payload
+        """
+        if raw == self._payload_key:
+            return
+        self._load_rules(json.loads(raw))
+        self._payload_key = raw
 
     def set_rules_from_dict(self, data: Dict[str, Any]) -> None:
         """Set rules from a dictionary (e.g., from JSON)."""
-        self._version = data.get("version", "")
-        self._rules = {}
+        payload_key = json.dumps(data, sort_keys=True, default=str)
+        if payload_key == self._payload_key:
+            return
+        self._load_rules(data)
+        self._payload_key = payload_key
+
+    def _load_rules(self, data: Dict[str, Any]) -> None:
+        """Build FlagRules from a decoded payload and install them."""
+        flags: Dict[str, FlagRule] = {}
 
         for key, flag_data in data.get("flags", {}).items():
             rules = []
@@ -311,7 +488,7 @@ class LocalEvaluator:
                     conditions=conditions,
                 ))
 
-            self._rules[key] = FlagRule(
+            flags[key] = FlagRule(
                 key=key,
                 enabled=flag_data.get("enabled", False),
                 rollout=flag_data.get("rollout", 0),
@@ -319,10 +496,12 @@ class LocalEvaluator:
                 rules=rules,
             )
 
+        self._install_rules(data.get("version", ""), flags)
+
     @property
     def version(self) -> str:
         """Get the current rules version."""
-        return self._version
+        return self._state.version
 
     def evaluate(
         self,
@@ -331,15 +510,36 @@ class LocalEvaluator:
         default_value: bool = False
     ) -> bool:
         """Evaluate a single flag."""
-        rule = self._rules.get(flag_key)
+        state = self._state
+        constant = state.constants.get(flag_key)
+        if constant is not None:
+            return constant
+        rule = state.flags.get(flag_key)
         if rule is None:
             return default_value
-        return evaluate_flag(rule, user)
+        if user is None or not user.id or flag_key not in state.memoizable:
+            return evaluate_flag(rule, user)
+
+        cache = state.cache
+        cache_key = (flag_key, user.id)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            # Another thread may evict the entry between get and move_to_end
+            with contextlib.suppress(KeyError):
+                cache.move_to_end(cache_key)
+            return cached
+
+        result = evaluate_flag(rule, user)
+        cache[cache_key] = result
+        if len(cache) > EVAL_CACHE_SIZE:
+            with contextlib.suppress(KeyError):
+                cache.popitem(last=False)
+        return result
 
     def evaluate_all(self, user: Optional[UserContext]) -> Dict[str, bool]:
         """Evaluate all flags."""
-        return evaluate_all_flags(self._rules, user)
+        return evaluate_all_flags(self._state.flags, user)
 
     def has_flag(self, flag_key: str) -> bool:
         """Check if a flag exists."""
-        return flag_key in self._rules
+        return flag_key in self._state.flags
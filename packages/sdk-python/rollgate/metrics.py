@@ -4,10 +4,14 @@ Tracks request performance, cache efficiency, error rates, and flag evaluations.
 """
 
 import time
+from bisect import bisect_left, insort
 from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Callable, Any
+from typing import Deque, Dict, List, Optional, Callable, Any, Tuple
 from enum import Enum
-from collections import defaultdict
+from functools import lru_cache
+from collections import defaultdict, deque
+
+from ._compat import DATACLASS_SLOTS
 
 
 class CircuitStateValue(Enum):
@@ -17,7 +21,7 @@ class CircuitStateValue(Enum):
     HALF_OPEN = "half-open"
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class WindowedStats:
     """Statistics for a time window."""
     requests: int = 0
@@ -26,7 +30,7 @@ class WindowedStats:
     error_rate: float = 0
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class FlagStats:
     """Statistics for a single flag."""
     evaluations: int = 0
@@ -36,7 +40,7 @@ class FlagStats:
     avg_evaluation_time_ms: float = 0
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class FlagEvaluationMetrics:
     """Flag evaluation metrics."""
     total_evaluations: int = 0
@@ -44,7 +48,7 @@ class FlagEvaluationMetrics:
     avg_evaluation_time_ms: float = 0
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class TimeWindowMetrics:
     """Time-windowed metrics."""
     one_minute: WindowedStats = field(default_factory=WindowedStats)
@@ -53,7 +57,7 @@ class TimeWindowMetrics:
     one_hour: WindowedStats = field(default_factory=WindowedStats)
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class MetricsSnapshot:
     """Complete snapshot of all metrics."""
     # Request metrics
@@ -96,7 +100,7 @@ class MetricsSnapshot:
     last_request_at: Optional[int] = None
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class RequestMetrics:
     """Metrics for a single request."""
     endpoint: str
@@ -108,15 +112,7 @@ class RequestMetrics:
     error_category: Optional[str] = None
 
 
-@dataclass
-class TimestampedRequest:
-    """Request with timestamp for time windows."""
-    timestamp: float
-    latency_ms: float
-    success: bool
-
-
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class FlagEvaluation:
     """Record of a flag evaluation."""
     flag_key: str
@@ -133,6 +129,81 @@ TIME_WINDOWS = {
     "1h": 60 * 60,
 }
 
+# One per-second bucket for every second of the longest window
+_WINDOW_BUCKETS = max(TIME_WINDOWS.values())
+
+
+def _circuit_gauge(snap: MetricsSnapshot) -> float:
+    """Map circuit state to 0 (closed), 0.5 (half-open) or 1 (open)."""
+    if snap.circuit_state == "open":
+        return 1
+    if snap.circuit_state == "half-open":
+        return 0.5
+    return 0
+
+
+# (name, help, type, value) for each exported Prometheus series, in output order
+_PROMETHEUS_METRICS: Tuple[Tuple[str, str, str, Callable[[MetricsSnapshot], float]], ...] = (
+    # Request metrics
+    ("requests_total", "Total number of requests", "counter", lambda s: s.total_requests),
+    (
+        "requests_success_total",
+        "Total successful requests",
+        "counter",
+        lambda s: s.successful_requests,
+    ),
+    ("requests_failed_total", "Total failed requests", "counter", lambda s: s.failed_requests),
+    # Latency metrics
+    (
+        "latency_avg_ms",
+        "Average request latency in milliseconds",
+        "gauge",
+        lambda s: s.avg_latency_ms,
+    ),
+    ("latency_p50_ms", "50th percentile latency", "gauge", lambda s: s.p50_latency_ms),
+    ("latency_p95_ms", "95th percentile latency", "gauge", lambda s: s.p95_latency_ms),
+    ("latency_p99_ms", "99th percentile latency", "gauge", lambda s: s.p99_latency_ms),
+    # Cache metrics
+    ("cache_hits_total", "Total cache hits", "counter", lambda s: s.cache_hits),
+    ("cache_misses_total", "Total cache misses", "counter", lambda s: s.cache_misses),
+    ("cache_hit_rate", "Cache hit rate percentage", "gauge", lambda s: s.cache_hit_rate),
+    # Circuit breaker metrics
+    ("circuit_opens_total", "Total circuit breaker opens", "counter", lambda s: s.circuit_opens),
+    (
+        "circuit_state",
+        "Circuit breaker state (0=closed, 0.5=half-open, 1=open)",
+        "gauge",
+        _circuit_gauge,
+    ),
+    # Flag evaluation metrics
+    (
+        "evaluations_total",
+        "Total flag evaluations",
+        "counter",
+        lambda s: s.flag_evaluations.total_evaluations,
+    ),
+    (
+        "evaluation_avg_time_ms",
+        "Average evaluation time in milliseconds",
+        "gauge",
+        lambda s: s.flag_evaluations.avg_evaluation_time_ms,
+    ),
+    # Uptime
+    ("uptime_seconds", "SDK uptime in seconds", "gauge", lambda s: s.uptime_ms / 1000),
+)
+
+
+@lru_cache(maxsize=8)
+def _prometheus_template(prefix: str) -> str:
+    """Build the exposition text for a prefix once, with a {} slot per value."""
+    lines: List[str] = []
+    for name, help_text, metric_type, _ in _PROMETHEUS_METRICS:
+        full_name = f"{prefix}_{name}".replace("{", "{{").replace("}", "}}")
+        lines.append(f"# HELP {full_name} {help_text}")
+        lines.append(f"# TYPE {full_name} {metric_type}")
+        lines.append(f"{full_name} {{}}")
+    return "\n".join(lines)
+
 
 class SDKMetrics:
     """
@@ -162,9 +233,16 @@ class SDKMetrics:
         ```
     """
 
-    def __init__(self):
-        """Initialize metrics collector."""
-        self._total_requests = 0
+    def __init__(self, time_source: Callable[[], float] = time.time):
+        """
+        Initialize metrics collector.
+
+        Args:
+            time_source: Clock returning seconds since the epoch
+        """
+        self._now = time_source
+        # Lock-free int counters; the request total is derived in snapshot()
+        # so record_request bumps a single counter.
         self._successful_requests = 0
         self._failed_requests = 0
         self._cache_hits = 0
@@ -174,27 +252,35 @@ class SDKMetrics:
         self._circuit_closes = 0
         self._circuit_state = CircuitStateValue.CLOSED
 
-        self._latencies: List[float] = []
+        # Latency window kept twice: in arrival order for eviction, and
+        # sorted (maintained with bisect) so snapshot() never sorts.
+        self._latencies: Deque[float] = deque()
+        self._sorted_latencies: List[float] = []
+        self._latency_sum = 0.0
         self._max_latency_history = 1000
 
         self._errors_by_category: Dict[str, int] = defaultdict(int)
 
-        # Time-windowed request tracking
-        self._timestamped_requests: List[TimestampedRequest] = []
-        self._max_timestamped_requests = 10000
+        # Time-windowed request tracking: a ring of per-second buckets
+        # (parallel lists indexed by second % _WINDOW_BUCKETS). A slot whose
+        # stored second is stale is zeroed on the next write to it.
+        self._reset_window_buckets()
 
         # Flag evaluation tracking
         self._flag_stats: Dict[str, Dict[str, Any]] = {}
-        self._timestamped_evaluations: List[FlagEvaluation] = []
         self._max_timestamped_evaluations = 10000
+        self._timestamped_evaluations: Deque[FlagEvaluation] = deque(
+            maxlen=self._max_timestamped_evaluations
+        )
         self._total_evaluations = 0
         self._total_evaluation_time_ms = 0.0
 
-        self._start_time = time.time()
+        self._start_time = self._now()
         self._last_request_at: Optional[float] = None
 
-        # Event listeners
-        self._listeners: Dict[str, List[Callable[[MetricsSnapshot], None]]] = defaultdict(list)
+        # Event listeners. Tuples are rebuilt on (rare) on/off so emitting
+        # iterates a stable sequence even if a callback unsubscribes itself.
+        self._listeners: Dict[str, Tuple[Callable[[MetricsSnapshot], None], ...]] = {}
 
     def record_request(self, metrics: RequestMetrics) -> None:
         """
@@ -203,8 +289,7 @@ class SDKMetrics:
         Args:
             metrics: Request metrics to record
         """
-        now = time.time()
-        self._total_requests += 1
+        now = self._now()
         self._last_request_at = now
 
         success = 200 <= metrics.status_code < 400
@@ -224,25 +309,34 @@ class SDKMetrics:
             self._cache_misses += 1
 
         # Track latency
-        self._latencies.append(metrics.latency_ms)
+        latency = metrics.latency_ms
+        self._latencies.append(latency)
+        insort(self._sorted_latencies, latency)
+        self._latency_sum += latency
         if len(self._latencies) > self._max_latency_history:
-            self._latencies.pop(0)
-
-        # Track timestamped request for time windows
-        self._timestamped_requests.append(TimestampedRequest(
-            timestamp=now,
-            latency_ms=metrics.latency_ms,
-            success=success,
-        ))
-        if len(self._timestamped_requests) > self._max_timestamped_requests:
-            self._timestamped_requests.pop(0)
+            evicted = self._latencies.popleft()
+            del self._sorted_latencies[bisect_left(self._sorted_latencies, evicted)]
+            self._latency_sum -= evicted
+
+        # Track request in the current per-second bucket
+        second = int(now)
+        slot = second % _WINDOW_BUCKETS
+        if self._bucket_seconds[slot] != second:
+            self._bucket_seconds[slot] = second
+            self._bucket_requests[slot] = 0
+            self._bucket_errors[slot] = 0
+            self._bucket_latency[slot] = 0.0
+        self._bucket_requests[slot] += 1
+        if not success:
+            self._bucket_errors[slot] += 1
+        self._bucket_latency[slot] += latency
 
         # Track errors by category
         if metrics.error_category:
             self._errors_by_category[metrics.error_category] += 1
 
         # Emit update event
-        self._emit("request", self.snapshot())
+        self._emit("request")
 
     def record_evaluation(
         self,
@@ -258,7 +352,7 @@ class SDKMetrics:
             result: Evaluation result
             evaluation_time_ms: Time taken to evaluate
         """
-        now = time.time()
+        now = self._now()
         self._total_evaluations += 1
         self._total_evaluation_time_ms += evaluation_time_ms
 
@@ -283,11 +377,9 @@ class SDKMetrics:
             evaluation_time_ms=evaluation_time_ms,
             timestamp=now,
         ))
-        if len(self._timestamped_evaluations) > self._max_timestamped_evaluations:
-            self._timestamped_evaluations.pop(0)
 
         # Emit update event
-        self._emit("evaluation", self.snapshot())
+        self._emit("evaluation")
 
     def record_circuit_state_change(self, new_state: CircuitStateValue) -> None:
         """
@@ -304,7 +396,7 @@ class SDKMetrics:
         elif new_state == CircuitStateValue.CLOSED and old_state != CircuitStateValue.CLOSED:
             self._circuit_closes += 1
 
-        self._emit("circuit-change", self.snapshot())
+        self._emit("circuit-change")
 
     def get_circuit_state(self) -> CircuitStateValue:
         """Get current circuit breaker state."""
@@ -322,7 +414,7 @@ class SDKMetrics:
             event: Event name ('request', 'evaluation', 'circuit-change')
             callback: Callback function
         """
-        self._listeners[event].append(callback)
+        self._listeners[event] = self._listeners.get(event, ()) + (callback,)
 
     def off(
         self,
@@ -336,16 +428,22 @@ class SDKMetrics:
             event: Event name
             callback: Callback function to remove
         """
-        if callback in self._listeners[event]:
-            self._listeners[event].remove(callback)
+        listeners = list(self._listeners.get(event, ()))
+        if callback in listeners:
+            listeners.remove(callback)
+            self._listeners[event] = tuple(listeners)
 
     def clear_listeners(self) -> None:
         """Clear all listeners (for cleanup)."""
         self._listeners.clear()
 
-    def _emit(self, event: str, data: MetricsSnapshot) -> None:
-        """Emit an event to all listeners."""
-        for callback in self._listeners.get(event, []):
+    def _emit(self, event: str) -> None:
+        """Emit a snapshot to all listeners, building it only if someone listens."""
+        listeners = self._listeners.get(event)
+        if not listeners:
+            return
+        data = self.snapshot()
+        for callback in listeners:
             try:
                 callback(data)
             except Exception:
@@ -358,23 +456,26 @@ class SDKMetrics:
         Returns:
             Complete metrics snapshot
         """
-        sorted_latencies = sorted(self._latencies)
+        sorted_latencies = self._sorted_latencies
         total_cache_requests = self._cache_hits + self._cache_misses
+        total_requests = self._successful_requests + self._failed_requests
 
         return MetricsSnapshot(
-            total_requests=self._total_requests,
+            total_requests=total_requests,
             successful_requests=self._successful_requests,
             failed_requests=self._failed_requests,
             success_rate=(
-                (self._successful_requests / self._total_requests) * 100
-                if self._total_requests > 0 else 0
+                (self._successful_requests / total_requests) * 100
+                if total_requests > 0 else 0
             ),
             error_rate=(
-                (self._failed_requests / self._total_requests) * 100
-                if self._total_requests > 0 else 0
+                (self._failed_requests / total_requests) * 100
+                if total_requests > 0 else 0
             ),
 
-            avg_latency_ms=self._calculate_average(sorted_latencies),
+            avg_latency_ms=(
+                self._latency_sum / len(sorted_latencies) if sorted_latencies else 0
+            ),
             min_latency_ms=sorted_latencies[0] if sorted_latencies else 0,
             max_latency_ms=sorted_latencies[-1] if sorted_latencies else 0,
             p50_latency_ms=self._calculate_percentile(sorted_latencies, 50),
@@ -398,7 +499,7 @@ class SDKMetrics:
             flag_evaluations=self._get_flag_evaluation_metrics(),
             windows=self._get_time_window_metrics(),
 
-            uptime_ms=int((time.time() - self._start_time) * 1000),
+            uptime_ms=int((self._now() - self._start_time) * 1000),
             last_request_at=(
                 int(self._last_request_at * 1000)
                 if self._last_request_at else None
@@ -431,31 +532,42 @@ class SDKMetrics:
             ),
         )
 
-    def _get_time_window_metrics(self) -> TimeWindowMetrics:
-        """Get time-windowed metrics."""
-        now = time.time()
-        return TimeWindowMetrics(
-            one_minute=self._calculate_window_stats(now, TIME_WINDOWS["1m"]),
-            five_minutes=self._calculate_window_stats(now, TIME_WINDOWS["5m"]),
-            fifteen_minutes=self._calculate_window_stats(now, TIME_WINDOWS["15m"]),
-            one_hour=self._calculate_window_stats(now, TIME_WINDOWS["1h"]),
-        )
-
-    def _calculate_window_stats(self, now: float, window_seconds: float) -> WindowedStats:
-        """Calculate stats for a time window."""
-        cutoff = now - window_seconds
-        window_requests = [r for r in self._timestamped_requests if r.timestamp >= cutoff]
-
-        requests = len(window_requests)
-        errors = sum(1 for r in window_requests if not r.success)
-        total_latency = sum(r.latency_ms for r in window_requests)
+    def _reset_window_buckets(self) -> None:
+        """Allocate an empty per-second bucket ring."""
+        self._bucket_seconds: List[int] = [-1] * _WINDOW_BUCKETS
+        self._bucket_requests: List[int] = [0] * _WINDOW_BUCKETS
+        self._bucket_errors: List[int] = [0] * _WINDOW_BUCKETS
+        self._bucket_latency: List[float] = [0.0] * _WINDOW_BUCKETS
 
-        return WindowedStats(
-            requests=requests,
-            errors=errors,
-            avg_latency_ms=total_latency / requests if requests > 0 else 0,
-            error_rate=(errors / requests) * 100 if requests > 0 else 0,
-        )
+    def _get_time_window_metrics(self) -> TimeWindowMetrics:
+        """Get time-windowed metrics in a single pass over the bucket ring."""
+        current = int(self._now())
+        windows = list(TIME_WINDOWS.values())
+        requests = [0] * len(windows)
+        errors = [0] * len(windows)
+        latency = [0.0] * len(windows)
+
+        for slot, second in enumerate(self._bucket_seconds):
+            age = current - second
+            if second < 0 or not 0 <= age < _WINDOW_BUCKETS:
+                continue
+            count = self._bucket_requests[slot]
+            for i, window_seconds in enumerate(windows):
+                if age < window_seconds:
+                    requests[i] += count
+                    errors[i] += self._bucket_errors[slot]
+                    latency[i] += self._bucket_latency[slot]
+
+        stats = [
+            WindowedStats(
+                requests=requests[i],
+                errors=errors[i],
+                avg_latency_ms=latency[i] / requests[i] if requests[i] > 0 else 0,
+                error_rate=(errors[i] / requests[i]) * 100 if requests[i] > 0 else 0,
+            )
+            for i in range(len(windows))
+        ]
+        return TimeWindowMetrics(*stats)
 
     def to_prometheus(self, prefix: str = "rollgate_sdk") -> str:
         """
@@ -468,54 +580,12 @@ class SDKMetrics:
             Metrics in Prometheus text format
         """
         snap = self.snapshot()
-        lines: List[str] = []
-
-        def metric(name: str, value: float, help_text: str = "", metric_type: str = ""):
-            full_name = f"{prefix}_{name}"
-            if help_text:
-                lines.append(f"# HELP {full_name} {help_text}")
-            if metric_type:
-                lines.append(f"# TYPE {full_name} {metric_type}")
-            lines.append(f"{full_name} {value}")
-
-        # Request metrics
-        metric("requests_total", snap.total_requests, "Total number of requests", "counter")
-        metric("requests_success_total", snap.successful_requests, "Total successful requests", "counter")
-        metric("requests_failed_total", snap.failed_requests, "Total failed requests", "counter")
-
-        # Latency metrics
-        metric("latency_avg_ms", snap.avg_latency_ms, "Average request latency in milliseconds", "gauge")
-        metric("latency_p50_ms", snap.p50_latency_ms, "50th percentile latency", "gauge")
-        metric("latency_p95_ms", snap.p95_latency_ms, "95th percentile latency", "gauge")
-        metric("latency_p99_ms", snap.p99_latency_ms, "99th percentile latency", "gauge")
-
-        # Cache metrics
-        metric("cache_hits_total", snap.cache_hits, "Total cache hits", "counter")
-        metric("cache_misses_total", snap.cache_misses, "Total cache misses", "counter")
-        metric("cache_hit_rate", snap.cache_hit_rate, "Cache hit rate percentage", "gauge")
-
-        # Circuit breaker metrics
-        metric("circuit_opens_total", snap.circuit_opens, "Total circuit breaker opens", "counter")
-        circuit_value = 0 if snap.circuit_state == "closed" else (1 if snap.circuit_state == "open" else 0.5)
-        metric("circuit_state", circuit_value, "Circuit breaker state (0=closed, 0.5=half-open, 1=open)", "gauge")
-
-        # Flag evaluation metrics
-        metric("evaluations_total", snap.flag_evaluations.total_evaluations, "Total flag evaluations", "counter")
-        metric(
-            "evaluation_avg_time_ms",
-            snap.flag_evaluations.avg_evaluation_time_ms,
-            "Average evaluation time in milliseconds",
-            "gauge",
+        return _prometheus_template(prefix).format(
+            *(value(snap) for _, _, _, value in _PROMETHEUS_METRICS)
         )
 
-        # Uptime
-        metric("uptime_seconds", snap.uptime_ms / 1000, "SDK uptime in seconds", "gauge")
-
-        return "\n".join(lines)
-
     def reset(self) -> None:
         """Reset all metrics."""
-        self._total_requests = 0
         self._successful_requests = 0
         self._failed_requests = 0
         self._cache_hits = 0
@@ -524,23 +594,18 @@ class SDKMetrics:
         self._circuit_opens = 0
         self._circuit_closes = 0
         self._circuit_state = CircuitStateValue.CLOSED
-        self._latencies = []
+        self._latencies = deque()
+        self._sorted_latencies = []
+        self._latency_sum = 0.0
         self._errors_by_category = defaultdict(int)
-        self._timestamped_requests = []
+        self._reset_window_buckets()
         self._flag_stats = {}
-        self._timestamped_evaluations = []
+        self._timestamped_evaluations.clear()
         self._total_evaluations = 0
         self._total_evaluation_time_ms = 0.0
-        self._start_time = time.time()
+        self._start_time = self._now()
         self._last_request_at = None
 
-    @staticmethod
-    def _calculate_average(sorted_values: List[float]) -> float:
-        """Calculate average of sorted values."""
-        if not sorted_values:
-            return 0
-        return sum(sorted_values) / len(sorted_values)
-
     @staticmethod
     def _calculate_percentile(sorted_values: List[float], percentile: float) -> float:
         """Calculate percentile of sorted values."""
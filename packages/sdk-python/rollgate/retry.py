@@ -4,10 +4,10 @@ Retry utility with exponential backoff and jitter.
 
 import asyncio
 import random
+import re
 from dataclasses import dataclass, field
-from typing import Callable, TypeVar, Optional, Awaitable, Generic
-
-from rollgate.errors import RollgateError
+from functools import lru_cache
+from typing import Callable, TypeVar, Optional, Awaitable, Generic, Tuple
 
 T = TypeVar("T")
 
@@ -41,6 +41,39 @@ class RetryResult(Generic[T]):
 
 DEFAULT_RETRY_CONFIG = RetryConfig()
 
+_RETRYABLE_INDICATORS = (
+    # Network errors (always retry)
+    "econnrefused",
+    "etimedout",
+    "enotfound",
+    "econnreset",
+    "network",
+    "connection",
+    "timeout",
+    "dns",
+    # HTTP 5xx errors (server issues, retry)
+    "500",
+    "502",
+    "503",
+    "504",
+    # Rate limiting (retry with backoff)
+    "429",
+    "too many requests",
+)
+_RETRYABLE_PATTERN = re.compile("|".join(map(re.escape, _RETRYABLE_INDICATORS)))
+
+
+_BACKOFF_TABLE_SIZE = 32
+
+
+@lru_cache(maxsize=64)
+def _backoff_table(base_delay_ms: int, max_delay_ms: int) -> Tuple[float, ...]:
+    """Capped exponential delays (ms) for attempts 0..31 of one config."""
+    return tuple(
+        min(base_delay_ms * (1 << attempt), max_delay_ms)
+        for attempt in range(_BACKOFF_TABLE_SIZE)
+    )
+
 
 def calculate_backoff(attempt: int, config: RetryConfig) -> float:
     """
@@ -53,11 +86,11 @@ def calculate_backoff(attempt: int, config: RetryConfig) -> float:
     Returns:
         Delay in seconds
     """
-    # Exponential: base_delay * 2^attempt
-    exponential_delay = config.base_delay_ms * (2**attempt)
-
-    # Cap at max_delay
-    capped_delay = min(exponential_delay, config.max_delay_ms)
+    # Exponential: base_delay * 2^attempt, capped at max_delay
+    if 0 <= attempt < _BACKOFF_TABLE_SIZE:
+        capped_delay = _backoff_table(config.base_delay_ms, config.max_delay_ms)[attempt]
+    else:
+        capped_delay = min(config.base_delay_ms * (2**attempt), config.max_delay_ms)
 
     # Add jitter: random value between -jitter and +jitter
     jitter = capped_delay * config.jitter_factor * (random.random() * 2 - 1)
@@ -76,40 +109,15 @@ def is_retryable_error(error: Exception) -> bool:
     Returns:
         True if the error should be retried
     """
-    if isinstance(error, RollgateError):
-        return error.retryable
-
-    message = str(error).lower()
-
-    # Network errors (always retry)
-    network_indicators = [
-        "econnrefused",
-        "etimedout",
-        "enotfound",
-        "econnreset",
-        "network",
-        "connection",
-        "timeout",
-        "dns",
-    ]
-    if any(indicator in message for indicator in network_indicators):
-        return True
-
-    # HTTP 5xx errors (server issues, retry)
-    server_errors = ["500", "502", "503", "504"]
-    if any(code in message for code in server_errors):
-        return True
-
-    # Rate limiting (retry with backoff)
-    if "429" in message or "too many requests" in message:
-        return True
-
-    # HTTP 4xx errors (client errors, don't retry)
-    client_errors = ["400", "401", "403", "404"]
-    if any(code in message for code in client_errors):
-        return False
-
-    return False
+    # Errors raised by the SDK's own transport are typed at the source, so
+    # the common case is a single attribute load.
+    retryable = getattr(error, "retryable", None)
+    if isinstance(retryable, bool):
+        return retryable
+
+    # Fallback for untyped exceptions from user callables: single pass over
+    # the message; anything unmatched (including HTTP 4xx) is not retried.
+    return _RETRYABLE_PATTERN.search(str(error).lower()) is not None
 
 
 async def fetch_with_retry(
@@ -4,14 +4,76 @@ and reporting them to the Rollgate server in batches.
 """
 
 import asyncio
+import contextlib
+import json
 import logging
 from dataclasses import dataclass, field
+from enum import Enum
 from typing import Dict, Optional
 
 import httpx
 
+try:
+    import msgspec  # type: ignore[import-not-found, unused-ignore]
+except ImportError:
+    msgspec = None
+
 logger = logging.getLogger("rollgate.telemetry")
 
+try:
+    import h2  # type: ignore[import-not-found, unused-ignore]  # noqa: F401
+
+    _HTTP2_AVAILABLE = True
+except ImportError:
+    _HTTP2_AVAILABLE = False
+
+TELEMETRY_KEEPALIVE_EXPIRY_S = 300
+"""Keep-alive window for the telemetry connection (outlives the 60s flush interval)."""
+
+
+def build_telemetry_client(
+    timeout: float,
+    transport: Optional[httpx.AsyncBaseTransport] = None,
+) -> httpx.AsyncClient:
+    """
+    Build an HTTP client tuned for periodic telemetry flushes.
+
+    Flushes hit the same endpoint every flush interval, so the connection is
+    kept alive well past that interval to avoid a TLS handshake per flush.
+    HTTP/2 is used when the optional ``h2`` package is installed
+    (``pip install rollgate[http2]``), letting concurrent flushes share one
+    connection.
+
+    Args:
+        timeout: Request timeout in seconds
+        transport: Optional transport override
+
+    Returns:
+        A new httpx.AsyncClient owned by the caller
+    """
+    return httpx.AsyncClient(
+        transport=transport,
+        http2=_HTTP2_AVAILABLE,
+        timeout=timeout,
+        limits=httpx.Limits(
+            max_keepalive_connections=4,
+            keepalive_expiry=TELEMETRY_KEEPALIVE_EXPIRY_S,
+        ),
+    )
+
+
+class BackpressureStrategy(str, Enum):
+    """What to do with a failed batch when the buffer is over its high watermark."""
+
+    DROP_OLDEST = "drop_oldest"
+    """Discard the failed batch, keeping evaluations recorded since the flush."""
+
+    DROP_NEWEST = "drop_newest"
+    """Keep the failed batch, discarding evaluations recorded since the flush."""
+
+    SAMPLE = "sample"
+    """Restore a proportional sample of the failed batch that fits the watermark."""
+
 
 @dataclass
 class TelemetryConfig:
@@ -20,6 +82,8 @@ class TelemetryConfig:
     flush_interval_ms: int = 60000
     max_buffer_size: int = 1000
     enabled: bool = True
+    backpressure_strategy: BackpressureStrategy = BackpressureStrategy.DROP_OLDEST
+    """Applied on flush failure once the buffer would exceed 2x max_buffer_size."""
 
 
 @dataclass
@@ -38,8 +102,49 @@ class TelemetryEvalStats:
         }
 
 
+if msgspec is not None:
+
+    class _EvalStatsPayload(msgspec.Struct):  # type: ignore[misc, unused-ignore]
+        total: int
+        true: int
+        false: int
+
+    class _TelemetryPayload(msgspec.Struct):  # type: ignore[misc, unused-ignore]
+        evaluations: Dict[str, _EvalStatsPayload]
+        period_ms: int
+
+    _msgspec_encoder = msgspec.json.Encoder()
+
+
+def _encode_payload(evaluations: Dict[str, TelemetryEvalStats], period_ms: int) -> bytes:
+    """Serialize a telemetry batch, using msgspec when installed."""
+    if msgspec is not None:
+        encoded: bytes = _msgspec_encoder.encode(
+            _TelemetryPayload(
+                evaluations={
+                    key: _EvalStatsPayload(stats.total, stats.true_count, stats.false_count)
+                    for key, stats in evaluations.items()
+                },
+                period_ms=period_ms,
+            )
+        )
+        return encoded
+    return json.dumps(
+        {
+            "evaluations": {key: stats.to_dict() for key, stats in evaluations.items()},
+            "period_ms": period_ms,
+        },
+        separators=(",", ":"),
+    ).encode()
+
+
 class TelemetryCollector:
-    """Tracks flag evaluations and sends them to the server in batches."""
+    """
+    Tracks flag evaluations and sends them to the server in batches.
+
+    The collector does not own ``http_client``; use
+    :func:`build_telemetry_client` for a dedicated keep-alive client.
+    """
 
     def __init__(
         self,
@@ -56,18 +161,30 @@ class TelemetryCollector:
         self._total_buffered = 0
         self._is_flushing = False
         self._flush_task: Optional[asyncio.Task] = None
+        self._flush_event: Optional[asyncio.Event] = None
+        self._pending_flush: Optional["asyncio.Task[None]"] = None
         self._closing = False
         self._last_flush_time: float = 0
 
-    def start(self) -> None:
-        """Start periodic flushing."""
+    def start(self, http_client: Optional[httpx.AsyncClient] = None) -> None:
+        """
+        Start periodic flushing.
+
+        Args:
+            http_client: Optional client to flush with from now on, replacing
+                the one given at construction
+        """
+        if http_client is not None:
+            self._http_client = http_client
         if not self._config.enabled or not self._endpoint or not self._api_key:
             return
 
         import time
 
         self._last_flush_time = time.time() * 1000
-        self._flush_task = asyncio.create_task(self._periodic_flush())
+        # Created here rather than in __init__ so it binds to the running loop
+        self._flush_event = asyncio.Event()
+        self._flush_task = asyncio.create_task(self._periodic_flush(self._flush_event))
 
     async def stop(self) -> None:
         """Stop the collector and perform a final flush."""
@@ -78,6 +195,8 @@ class TelemetryCollector:
                 await self._flush_task
             except asyncio.CancelledError:
                 pass
+        if self._pending_flush:
+            await self._pending_flush
         await self.flush()
 
     def record_evaluation(self, flag_key: str, result: bool) -> None:
@@ -98,7 +217,22 @@ class TelemetryCollector:
         self._total_buffered += 1
 
         if self._total_buffered >= self._config.max_buffer_size:
-            asyncio.ensure_future(self.flush())
+            # Wake the periodic flusher early instead of spawning a task per threshold hit
+            if self._flush_event is not None:
+                self._flush_event.set()
+            else:
+                self._schedule_flush()
+
+    def _schedule_flush(self) -> None:
+        """Flush in the background when the periodic flusher is not running."""
+        if self._pending_flush is not None and not self._pending_flush.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop to flush on; the buffer waits for start() or flush()
+            return
+        self._pending_flush = loop.create_task(self.flush())
 
     async def flush(self) -> None:
         """Flush buffered evaluations to the server."""
@@ -113,24 +247,17 @@ class TelemetryCollector:
         import time
 
         # Capture current data and reset buffer
-        evaluations_to_send = {
-            key: stats.to_dict() for key, stats in self._evaluations.items()
-        }
+        evaluations_to_send = self._evaluations
         now = time.time() * 1000
         period_ms = int(now - self._last_flush_time) if self._last_flush_time else 0
         self._evaluations = {}
         self._total_buffered = 0
         self._last_flush_time = now
 
-        payload = {
-            "evaluations": evaluations_to_send,
-            "period_ms": period_ms,
-        }
-
         try:
             response = await self._http_client.post(
                 self._endpoint,
-                json=payload,
+                content=_encode_payload(evaluations_to_send, period_ms),
                 headers={
                     "Authorization": f"Bearer {self._api_key}",
                     "Content-Type": "application/json",
@@ -139,23 +266,63 @@ class TelemetryCollector:
             if response.status_code != 200:
                 raise Exception(f"Telemetry request failed: {response.status_code}")
         except Exception as e:
-            # Restore buffer on failure
-            for key, stats_dict in evaluations_to_send.items():
-                if key in self._evaluations:
-                    self._evaluations[key].total += stats_dict["total"]
-                    self._evaluations[key].true_count += stats_dict["true"]
-                    self._evaluations[key].false_count += stats_dict["false"]
-                else:
-                    self._evaluations[key] = TelemetryEvalStats(
-                        total=stats_dict["total"],
-                        true_count=stats_dict["true"],
-                        false_count=stats_dict["false"],
-                    )
-                self._total_buffered += stats_dict["total"]
+            self._restore_failed_batch(evaluations_to_send)
             logger.warning(f"Failed to flush telemetry: {e}")
         finally:
             self._is_flushing = False
 
+    def _restore_failed_batch(self, batch: Dict[str, TelemetryEvalStats]) -> None:
+        """Merge a failed batch back into the buffer, bounded by the high watermark."""
+        failed_total = sum(stats.total for stats in batch.values())
+        high_watermark = self._config.max_buffer_size * 2
+
+        if self._total_buffered + failed_total <= high_watermark:
+            self._merge(batch)
+            return
+
+        strategy = self._config.backpressure_strategy
+        if strategy == BackpressureStrategy.DROP_NEWEST:
+            dropped = self._total_buffered
+            self._evaluations = {}
+            self._total_buffered = 0
+            self._merge(batch)
+        elif strategy == BackpressureStrategy.SAMPLE:
+            room = max(0, high_watermark - self._total_buffered)
+            # Per-flag counts are truncated, so fewer than `room` may fit
+            dropped = failed_total - self._merge(batch, ratio=room / failed_total)
+        else:
+            dropped = failed_total
+
+        logger.warning(f"Dropping {dropped} telemetry evaluations due to backpressure")
+
+    def _merge(self, batch: Dict[str, TelemetryEvalStats], ratio: float = 1.0) -> int:
+        """
+        Add a batch's stats back into the buffer, optionally scaled down.
+
+        Returns:
+            Number of evaluations actually merged
+        """
+        merged = 0
+        for key, batch_stats in batch.items():
+            true_count = batch_stats.true_count
+            false_count = batch_stats.false_count
+            if ratio < 1.0:
+                true_count = int(true_count * ratio)
+                false_count = int(false_count * ratio)
+            total = true_count + false_count
+            if total == 0:
+                continue
+
+            stats = self._evaluations.get(key)
+            if stats is None:
+                stats = self._evaluations[key] = TelemetryEvalStats()
+            stats.total += total
+            stats.true_count += true_count
+            stats.false_count += false_count
+            merged += total
+        self._total_buffered += merged
+        return merged
+
     def get_buffer_stats(self) -> Dict[str, int]:
         """Return current buffer statistics."""
         return {
@@ -163,10 +330,13 @@ class TelemetryCollector:
             "evaluationCount": self._total_buffered,
         }
 
-    async def _periodic_flush(self) -> None:
-        """Background task for periodic flushing."""
+    async def _periodic_flush(self, flush_event: asyncio.Event) -> None:
+        """Background task flushing every interval, or sooner when the buffer fills."""
+        interval = self._config.flush_interval_ms / 1000
         while not self._closing:
-            await asyncio.sleep(self._config.flush_interval_ms / 1000)
+            with contextlib.suppress(asyncio.TimeoutError):
+                await asyncio.wait_for(flush_event.wait(), timeout=interval)
+            flush_event.clear()
             if self._closing:
                 break
             try:
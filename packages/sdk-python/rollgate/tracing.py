@@ -3,20 +3,35 @@ W3C Trace Context support for distributed tracing.
 Implements traceparent header format for request correlation.
 """
 
+import base64
+import os
+import random
 import re
+import sys
+import threading
 import time
-import secrets
+from types import TracebackType
+from collections import deque
+from contextvars import ContextVar, Token
 from dataclasses import dataclass, field
-from typing import Dict, Optional, List
-from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Mapping, Optional, List, Tuple, Type
 
+import httpx
 
-# W3C Trace Context header names
-HEADER_TRACEPARENT = "traceparent"
-HEADER_TRACESTATE = "tracestate"
-HEADER_TRACE_ID = "x-trace-id"
-HEADER_SPAN_ID = "x-span-id"
-HEADER_REQUEST_ID = "x-request-id"
+from ._compat import DATACLASS_SLOTS
+
+
+# Sampling needs a fast uniform draw, not a CSPRNG
+_random = random.random
+
+# W3C Trace Context header names. Interned so dicts keyed by these constants
+# (ours and callers') compare keys by identity before falling back to ==;
+# hyphenated literals are not interned by the compiler on their own.
+HEADER_TRACEPARENT = sys.intern("traceparent")
+HEADER_TRACESTATE = sys.intern("tracestate")
+HEADER_TRACE_ID = sys.intern("x-trace-id")
+HEADER_SPAN_ID = sys.intern("x-span-id")
+HEADER_REQUEST_ID = sys.intern("x-request-id")
 
 # W3C traceparent format: version-trace_id-parent_id-flags
 # Example: 00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01
@@ -24,23 +39,95 @@ TRACEPARENT_REGEX = re.compile(
     r"^([0-9a-f]{2})-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$"
 )
 
+# Version 00 (the only one supported) baked in, for use with fullmatch()
+_TRACEPARENT_V00 = re.compile(r"00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})")
+
+# RFC 4648 base32 output mapped onto Crockford's alphabet (no I, L, O, U)
+_CROCKFORD_BASE32 = str.maketrans(
+    "ABCDEFGHIJKLMNOPQRSTUVWXYZ234567", "0123456789ABCDEFGHJKMNPQRSTVWXYZ"
+)
+
+
+def _crockford_base32(raw: bytes) -> str:
+    """Encode bytes as unpadded Crockford base32."""
+    return base64.b32encode(raw).decode("ascii").rstrip("=").translate(_CROCKFORD_BASE32)
+
+
+# Request id body encodings. Both carry the same 12 random bytes: "hex" is 24
+# chars, "base32" (Crockford) is 20 and stays unambiguous when case-folded.
+_REQUEST_ID_ENCODERS: Dict[str, Callable[[bytes], str]] = {
+    "hex": bytes.hex,
+    "base32": _crockford_base32,
+}
+
+
+def _request_id_encoder(encoding: str) -> Callable[[bytes], str]:
+    """Look up a request id encoder, rejecting unknown encodings."""
+    try:
+        return _REQUEST_ID_ENCODERS[encoding]
+    except KeyError:
+        raise ValueError(
+            f"Unknown request_id_encoding {encoding!r}; "
+            f"expected one of {sorted(_REQUEST_ID_ENCODERS)}"
+        ) from None
+
 
 def generate_trace_id() -> str:
     """Generate a 32-character hex trace ID."""
-    return secrets.token_hex(16)
+    return os.urandom(16).hex()
 
 
 def generate_span_id() -> str:
     """Generate a 16-character hex span ID."""
-    return secrets.token_hex(8)
+    return os.urandom(8).hex()
 
 
-def generate_request_id() -> str:
-    """Generate a unique request ID."""
-    return f"req_{secrets.token_hex(12)}"
+def generate_request_id(encoding: str = "hex") -> str:
+    """
+    Generate a unique request ID.
 
+    Args:
+        encoding: "hex" (default) or "base32" (Crockford)
+    """
+    return "req_" + _request_id_encoder(encoding)(os.urandom(12))
 
-@dataclass
+
+def _new_ids(
+    encode_request_id: Callable[[bytes], str] = bytes.hex,
+) -> Tuple[str, str, str]:
+    """Generate (trace_id, span_id, request_id) from a single urandom read."""
+    raw = os.urandom(36)
+    return raw[:16].hex(), raw[16:24].hex(), "req_" + encode_request_id(raw[24:])
+
+
+def _header_getter(headers: Mapping[str, str]) -> Callable[[str], Optional[str]]:
+    """
+    Return a case-insensitive lookup function for a header mapping.
+
+    ``httpx.Headers`` is already case-insensitive and is used as-is. For plain
+    dicts the lowercase and Title-Case spellings are probed directly; a
+    lowercased copy of the mapping is only built if both probes miss.
+    """
+    if isinstance(headers, httpx.Headers):
+        return headers.get
+
+    normalized: Optional[Dict[str, str]] = None
+
+    def get(name: str) -> Optional[str]:
+        nonlocal normalized
+        value = headers.get(name)
+        if value is None:
+            value = headers.get(name.title())
+        if value is None:
+            if normalized is None:
+                normalized = {k.lower(): v for k, v in headers.items()}
+            value = normalized.get(name)
+        return value
+
+    return get
+
+
+@dataclass(frozen=True, **DATACLASS_SLOTS)
 class TraceContext:
     """
     Represents W3C Trace Context for distributed tracing.
@@ -56,39 +143,63 @@ class TraceContext:
     - trace-id: 32 hex chars
     - parent-id: 16 hex chars
     - flags: 2 hex chars (01 = sampled)
+
+    Contexts are immutable so the propagation headers built at construction
+    always match the fields; use ``dataclasses.replace`` to derive a variant.
     """
 
-    trace_id: str = field(default_factory=generate_trace_id)
-    """32-character hex trace ID."""
+    trace_id: str = ""
+    """32-character hex trace ID (generated if empty)."""
 
-    span_id: str = field(default_factory=generate_span_id)
-    """16-character hex span ID."""
+    span_id: str = ""
+    """16-character hex span ID (generated if empty)."""
 
     parent_id: Optional[str] = None
     """Parent span ID for nested spans."""
 
-    request_id: str = field(default_factory=generate_request_id)
-    """Human-readable request ID."""
+    request_id: str = ""
+    """Human-readable request ID (generated if empty)."""
 
     sampled: bool = True
     """Whether this trace should be sampled."""
 
+    _headers: Dict[str, str] = field(init=False, repr=False, compare=False)
+    """Propagation headers, built once at construction."""
+
+    def __post_init__(self) -> None:
+        if not (self.trace_id and self.span_id and self.request_id):
+            trace_id, span_id, request_id = _new_ids()
+            object.__setattr__(self, "trace_id", self.trace_id or trace_id)
+            object.__setattr__(self, "span_id", self.span_id or span_id)
+            object.__setattr__(self, "request_id", self.request_id or request_id)
+
+        object.__setattr__(self, "_headers", {
+            HEADER_TRACEPARENT: (
+                "00-" + self.trace_id + "-" + self.span_id + ("-01" if self.sampled else "-00")
+            ),
+            HEADER_TRACE_ID: self.trace_id,
+            HEADER_SPAN_ID: self.span_id,
+            HEADER_REQUEST_ID: self.request_id,
+        })
+
     def get_headers(self) -> Dict[str, str]:
         """
         Get headers to propagate trace context.
 
         Returns:
-            Dictionary of headers to add to outgoing requests
+            Dictionary of headers to add to outgoing requests (a copy the
+            caller may modify)
         """
-        flags = "01" if self.sampled else "00"
-        traceparent = f"00-{self.trace_id}-{self.span_id}-{flags}"
+        return self._headers.copy()
 
-        return {
-            HEADER_TRACEPARENT: traceparent,
-            HEADER_TRACE_ID: self.trace_id,
-            HEADER_SPAN_ID: self.span_id,
-            HEADER_REQUEST_ID: self.request_id,
-        }
+    def get_headers_into(self, target: Dict[str, str]) -> None:
+        """
+        Write propagation headers directly into an existing dict.
+
+        Args:
+            target: Header dict to update in place
+        """
+        target.update(self._headers)
 
     def create_child(self) -> "TraceContext":
         """
@@ -97,83 +208,101 @@ class TraceContext:
         Returns:
             New TraceContext with same trace_id but new span_id
         """
-        return TraceContext(
-            trace_id=self.trace_id,
-            span_id=generate_span_id(),
-            parent_id=self.span_id,
-            request_id=self.request_id,
-            sampled=self.sampled,
+        # Bypass __init__/__post_init__: the child shares the parent's id
+        # strings and only the two span-dependent headers change.
+        child = TraceContext.__new__(TraceContext)
+        span_id = generate_span_id()
+        setattr_ = object.__setattr__
+        setattr_(child, "trace_id", self.trace_id)
+        setattr_(child, "span_id", span_id)
+        setattr_(child, "parent_id", self.span_id)
+        setattr_(child, "request_id", self.request_id)
+        setattr_(child, "sampled", self.sampled)
+        headers = self._headers.copy()
+        headers[HEADER_TRACEPARENT] = (
+            "00-" + self.trace_id + "-" + span_id + ("-01" if self.sampled else "-00")
         )
+        headers[HEADER_SPAN_ID] = span_id
+        setattr_(child, "_headers", headers)
+        return child
 
     @classmethod
-    def from_traceparent(cls, traceparent: str) -> Optional["TraceContext"]:
+    def from_traceparent(
+        cls,
+        traceparent: str,
+        request_id: Optional[str] = None,
+    ) -> Optional["TraceContext"]:
         """
         Parse a traceparent header.
 
         Args:
             traceparent: W3C traceparent header value
+            request_id: Incoming request ID to keep (a new one is generated
+                if omitted)
 
         Returns:
             TraceContext if valid, None if invalid
         """
-        match = TRACEPARENT_REGEX.match(traceparent.lower())
+        # Senders emit lowercase; only lowercase a value that failed as-is
+        match = _TRACEPARENT_V00.fullmatch(traceparent) or _TRACEPARENT_V00.fullmatch(
+            traceparent.lower()
+        )
         if not match:
             return None
 
-        version, trace_id, parent_id, flags = match.groups()
-
-        # Only support version 00
-        if version != "00":
-            return None
+        trace_id, parent_id, flags = match.groups()
 
         return cls(
             trace_id=trace_id,
-            span_id=generate_span_id(),
             parent_id=parent_id,
+            request_id=request_id or "",
             sampled=flags == "01",
         )
 
     @classmethod
-    def from_headers(cls, headers: Dict[str, str]) -> Optional["TraceContext"]:
+    def from_headers(
+        cls,
+        headers: Mapping[str, str],
+        assume_lower: bool = False,
+    ) -> Optional["TraceContext"]:
         """
         Extract trace context from request headers.
 
         Args:
-            headers: Request headers (case-insensitive)
+            headers: Request headers (case-insensitive); passing
+                ``httpx.Headers`` avoids any normalization
+            assume_lower: Header names are already lowercase (as ASGI
+                guarantees), so look them up directly
 
         Returns:
             TraceContext if found, None otherwise
         """
-        # Normalize header names to lowercase
-        normalized = {k.lower(): v for k, v in headers.items()}
+        get = headers.get if assume_lower else _header_getter(headers)
 
         # Try W3C traceparent first
-        traceparent = normalized.get(HEADER_TRACEPARENT)
+        traceparent = get(HEADER_TRACEPARENT)
         if traceparent:
-            ctx = cls.from_traceparent(traceparent)
+            # Preserve request ID if present
+            ctx = cls.from_traceparent(traceparent, get(HEADER_REQUEST_ID))
             if ctx:
-                # Preserve request ID if present
-                request_id = normalized.get(HEADER_REQUEST_ID)
-                if request_id:
-                    ctx.request_id = request_id
                 return ctx
 
         # Fall back to custom headers
-        trace_id = normalized.get(HEADER_TRACE_ID)
-        span_id = normalized.get(HEADER_SPAN_ID)
-        request_id = normalized.get(HEADER_REQUEST_ID)
+        trace_id = get(HEADER_TRACE_ID)
+        span_id = get(HEADER_SPAN_ID)
+        request_id = get(HEADER_REQUEST_ID)
 
         if trace_id:
             return cls(
                 trace_id=trace_id,
-                span_id=span_id or generate_span_id(),
-                request_id=request_id or generate_request_id(),
+                span_id=span_id or "",
+                request_id=request_id or "",
             )
 
         return None
 
 
-@dataclass
+@dataclass(**DATACLASS_SLOTS)
 class RequestTrace:
     """
     Tracks timing for a single request.
@@ -209,9 +338,19 @@ class RequestTrace:
     error: Optional[str] = None
     """Error message if request failed."""
 
+    time_source: Callable[[], int] = field(
+        default=time.perf_counter_ns, repr=False, compare=False
+    )
+    """Monotonic clock returning nanoseconds, used for latency."""
+
+    # None until start()/finish() run; any int, including 0, is a valid reading
+    _start_ns: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+    _latency_ns: Optional[int] = field(default=None, init=False, repr=False, compare=False)
+
     def start(self) -> None:
         """Mark request start time."""
         self.start_time = time.time()
+        self._start_ns = self.time_source()
 
     def finish(self, status_code: int, error: Optional[str] = None) -> None:
         """
@@ -221,16 +360,22 @@ class RequestTrace:
             status_code: HTTP status code
             error: Error message if failed
         """
-        self.end_time = time.time()
+        end_ns = self.time_source()
+        if self._start_ns is None:
+            self.end_time = time.time()
+        else:
+            self._latency_ns = end_ns - self._start_ns
+            # Derived from the monotonic duration, so no second wall-clock read
+            self.end_time = self.start_time + self._latency_ns / 1e9
         self.status_code = status_code
         self.error = error
 
     @property
     def latency_ms(self) -> float:
-        """Get request latency in milliseconds."""
-        if self.end_time == 0 or self.start_time == 0:
+        """Get request latency in milliseconds (monotonic clock)."""
+        if self._latency_ns is None:
             return 0
-        return (self.end_time - self.start_time) * 1000
+        return self._latency_ns / 1e6
 
     @property
     def success(self) -> bool:
@@ -238,6 +383,82 @@ class RequestTrace:
         return 200 <= self.status_code < 400 and self.error is None
 
 
+# Context of the request currently being traced in this thread/task
+_current_context: ContextVar[Optional[TraceContext]] = ContextVar(
+    "rollgate_trace_context", default=None
+)
+
+
+def current_context() -> Optional[TraceContext]:
+    """Get the trace context set by the enclosing trace_request(), if any."""
+    return _current_context.get()
+
+
+def _noop_extract_context(
+    headers: Mapping[str, str],
+    assume_lower: bool = False,
+) -> Optional[TraceContext]:
+    return None
+
+
+def _noop_inject_headers(
+    headers: Dict[str, str],
+    context: Optional[TraceContext] = None,
+) -> Dict[str, str]:
+    return headers
+
+
+def _noop_inject_headers_into(
+    headers: Dict[str, str],
+    context: Optional[TraceContext] = None,
+) -> None:
+    return None
+
+
+# Header methods replaced per instance while tracing is disabled
+_DISABLED_METHODS = (
+    ("extract_context", _noop_extract_context),
+    ("inject_headers", _noop_inject_headers),
+    ("inject_headers_into", _noop_inject_headers_into),
+)
+
+
+class _TraceScope:
+    """
+    Context manager returned by TracingManager.trace_request().
+
+    A plain __enter__/__exit__ pair, which avoids the generator frame and
+    wrapper object that @contextmanager allocates on every request.
+    """
+
+    __slots__ = ("_tracer", "_trace", "_token")
+
+    def __init__(self, tracer: "TracingManager", trace: RequestTrace):
+        self._tracer = tracer
+        self._trace = trace
+        self._token: Optional[Token[Optional[TraceContext]]] = None
+
+    def __enter__(self) -> RequestTrace:
+        trace = self._trace
+        self._token = _current_context.set(trace.context)
+        trace.start()
+        return trace
+
+    def __exit__(
+        self,
+        exc_type: Optional[Type[BaseException]],
+        exc: Optional[BaseException],
+        tb: Optional[TracebackType],
+    ) -> None:
+        if self._token is not None:
+            _current_context.reset(self._token)
+        tracer = self._tracer
+        trace = self._trace
+        # Store trace if enabled
+        if tracer._enabled and trace._latency_ns is not None:
+            tracer._record(trace, trace._latency_ns)
+
+
 class TracingManager:
     """
     Manages trace contexts for the SDK.
@@ -258,18 +479,41 @@ class TracingManager:
         ```
     """
 
-    def __init__(self, enabled: bool = True, sample_rate: float = 1.0):
+    def __init__(
+        self,
+        enabled: bool = True,
+        sample_rate: float = 1.0,
+        request_id_encoding: str = "hex",
+    ):
         """
         Initialize tracing manager.
 
         Args:
             enabled: Whether tracing is enabled
             sample_rate: Fraction of requests to sample (0.0 to 1.0)
+            request_id_encoding: Request ID body for new root contexts:
+                "hex" (24 chars) or "base32" (20 chars, Crockford)
+
+        Raises:
+            ValueError: If request_id_encoding is not a known encoding
         """
+        self._encode_request_id = _request_id_encoder(request_id_encoding)
         self._enabled = enabled
+        self._bind_header_methods()
         self._sample_rate = sample_rate
-        self._traces: List[RequestTrace] = []
+        # Rates of 0 and 1 are decided without drawing a random number
+        self._always_sample = sample_rate >= 1.0
+        self._never_sample = sample_rate <= 0.0
         self._max_traces = 1000
+        # (trace, latency_ns, failed) as recorded: a retained trace can still
+        # be finished again, so evictions subtract these, not its live state
+        self._traces: Deque[Tuple[RequestTrace, int, bool]] = deque(maxlen=self._max_traces)
+        # Running totals over the retained traces, updated on append/evict.
+        # One tracer is typically shared by every thread of a server, and the
+        # evict-then-append update is not atomic, so it is done under a lock.
+        self._latency_ns_sum = 0
+        self._error_count = 0
+        self._lock = threading.Lock()
 
     @property
     def enabled(self) -> bool:
@@ -280,6 +524,21 @@ class TracingManager:
     def enabled(self, value: bool) -> None:
         """Enable or disable tracing."""
         self._enabled = value
+        self._bind_header_methods()
+
+    def _bind_header_methods(self) -> None:
+        """
+        Shadow the header methods with no-ops while disabled.
+
+        Instance attributes take precedence over the class methods, so the
+        disabled path skips the enabled check entirely; re-enabling removes
+        them again.
+        """
+        for name, noop in _DISABLED_METHODS:
+            if self._enabled:
+                self.__dict__.pop(name, None)
+            else:
+                setattr(self, name, noop)
 
     def create_context(
         self,
@@ -296,25 +555,37 @@ class TracingManager:
         """
         if parent:
             return parent.create_child()
+        return self._create_sampled_context()
+
+    def _create_sampled_context(self) -> TraceContext:
+        """Create a root context, applying the sample rate."""
+        if not self._enabled or self._never_sample:
+            sampled = False
+        elif self._always_sample:
+            sampled = True
+        else:
+            sampled = _random() < self._sample_rate
+        trace_id, span_id, request_id = _new_ids(self._encode_request_id)
+        return TraceContext(
+            trace_id=trace_id, span_id=span_id, request_id=request_id, sampled=sampled
+        )
 
-        # Determine if this trace should be sampled
-        sampled = self._enabled and (secrets.randbelow(100) / 100 < self._sample_rate)
-
-        return TraceContext(sampled=sampled)
-
-    def extract_context(self, headers: Dict[str, str]) -> Optional[TraceContext]:
+    def extract_context(
+        self,
+        headers: Mapping[str, str],
+        assume_lower: bool = False,
+    ) -> Optional[TraceContext]:
         """
         Extract trace context from headers.
 
         Args:
             headers: Request headers
+            assume_lower: Header names are already lowercase
 
         Returns:
             TraceContext if found
         """
-        if not self._enabled:
-            return None
-        return TraceContext.from_headers(headers)
+        return TraceContext.from_headers(headers, assume_lower)
 
     def inject_headers(
         self,
@@ -326,25 +597,40 @@ class TracingManager:
 
         Args:
             headers: Existing headers
-            context: Trace context (creates new if None)
+            context: Trace context (defaults to current_context(), or a new
+                context outside of trace_request())
 
         Returns:
             Headers with trace context added
         """
-        if not self._enabled:
-            return headers
-
-        ctx = context or self.create_context()
+        ctx = context or _current_context.get() or self._create_sampled_context()
         result = dict(headers)
-        result.update(ctx.get_headers())
+        ctx.get_headers_into(result)
         return result
 
-    @contextmanager
+    def inject_headers_into(
+        self,
+        headers: Dict[str, str],
+        context: Optional[TraceContext] = None,
+    ) -> None:
+        """
+        Inject trace context into headers in place, without copying.
+
+        Use when the caller owns ``headers`` (e.g. a per-request dict built
+        in an httpx event hook).
+
+        Args:
+            headers: Headers to update
+            context: Trace context (same defaulting as inject_headers)
+        """
+        ctx = context or _current_context.get() or self._create_sampled_context()
+        ctx.get_headers_into(headers)
+
     def trace_request(
         self,
         endpoint: str,
         parent: Optional[TraceContext] = None,
-    ):
+    ) -> _TraceScope:
         """
         Context manager for tracing a request.
 
@@ -352,21 +638,26 @@ class TracingManager:
             endpoint: API endpoint
             parent: Optional parent context
 
-        Yields:
-            RequestTrace to record timing
+        Returns:
+            Context manager yielding a RequestTrace to record timing; its
+            context is also available via current_context() until the
+            block exits
         """
         ctx = self.create_context(parent)
-        trace = RequestTrace(context=ctx, endpoint=endpoint)
-        trace.start()
-
-        try:
-            yield trace
-        finally:
-            # Store trace if enabled
-            if self._enabled and trace.end_time > 0:
-                self._traces.append(trace)
-                if len(self._traces) > self._max_traces:
-                    self._traces.pop(0)
+        return _TraceScope(self, RequestTrace(context=ctx, endpoint=endpoint))
+
+    def _record(self, trace: RequestTrace, latency_ns: int) -> None:
+        """Retain a finished trace and keep the running totals in step."""
+        failed = not trace.success
+        with self._lock:
+            traces = self._traces
+            if len(traces) == self._max_traces:
+                _, evicted_latency_ns, evicted_failed = traces[0]
+                self._latency_ns_sum -= evicted_latency_ns
+                self._error_count -= evicted_failed
+            traces.append((trace, latency_ns, failed))
+            self._latency_ns_sum += latency_ns
+            self._error_count += failed
 
     def get_recent_traces(self, limit: int = 100) -> List[RequestTrace]:
         """
@@ -378,11 +669,15 @@ class TracingManager:
         Returns:
             List of recent RequestTrace objects
         """
-        return self._traces[-limit:]
+        with self._lock:
+            return [entry[0] for entry in list(self._traces)[-limit:]]
 
     def clear_traces(self) -> None:
         """Clear all stored traces."""
-        self._traces = []
+        with self._lock:
+            self._traces.clear()
+            self._latency_ns_sum = 0
+            self._error_count = 0
 
     def get_stats(self) -> Dict[str, float]:
         """
@@ -391,29 +686,21 @@ class TracingManager:
         Returns:
             Dictionary with trace_count, avg_latency_ms, error_rate
         """
-        traces = self._traces
-        if not traces:
+        with self._lock:
+            count = len(self._traces)
+            latency_ns_sum = self._latency_ns_sum
+            error_count = self._error_count
+        if count == 0:
             return {
                 "trace_count": 0,
                 "avg_latency_ms": 0,
                 "error_rate": 0,
             }
 
-        completed = [t for t in traces if t.end_time > 0]
-        if not completed:
-            return {
-                "trace_count": len(traces),
-                "avg_latency_ms": 0,
-                "error_rate": 0,
-            }
-
-        total_latency = sum(t.latency_ms for t in completed)
-        errors = sum(1 for t in completed if not t.success)
-
         return {
-            "trace_count": len(traces),
-            "avg_latency_ms": total_latency / len(completed),
-            "error_rate": errors / len(completed),
+            "trace_count": count,
+            "avg_latency_ms": latency_ns_sum / count / 1e6,
+            "error_rate": error_count / count,
         }
 
 
@@ -429,6 +716,14 @@ def get_tracer() -> TracingManager:
     return _global_tracer
 
 
-def create_tracer(enabled: bool = True, sample_rate: float = 1.0) -> TracingManager:
+def create_tracer(
+    enabled: bool = True,
+    sample_rate: float = 1.0,
+    request_id_encoding: str = "hex",
+) -> TracingManager:
     """Create a new tracer instance."""
-    return TracingManager(enabled=enabled, sample_rate=sample_rate)
+    return TracingManager(
+        enabled=enabled,
+        sample_rate=sample_rate,
+        request_id_encoding=request_id_encoding,
+    )
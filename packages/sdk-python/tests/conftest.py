@@ -0,0 +1,63 @@
+"""Shared test fixtures."""
+
+from collections import Counter
+
+import pytest
+
+try:
+    import uvloop
+except ImportError:  # Windows, or dev extras not installed; stdlib loop is used
+    uvloop = None
+
+
+if uvloop is not None:
+
+    @pytest.hookimpl(optionalhook=True)
+    def pytest_asyncio_loop_factories(config, item):
+        """Run async tests on uvloop instead of the stdlib selector loop."""
+        return {"uvloop": uvloop.new_event_loop}
+
+
+class FakeClock:
+    """Manually advanced clock usable as a ``time_source``."""
+
+    def __init__(self, start: float = 1000.0):
+        self.t = start
+
+    def __call__(self) -> float:
+        return self.t
+
+    def advance(self, ms: float) -> None:
+        """Move the clock forward by ``ms`` milliseconds."""
+        self.t += ms / 1000
+
+
+class EventRecorder:
+    """Counts event callbacks and keeps the arguments of the latest one."""
+
+    __slots__ = ("counts", "last")
+
+    def __init__(self):
+        self.counts = Counter()
+        self.last = {}
+
+    def handler(self, name: str):
+        """Return a callback that records calls under ``name``."""
+
+        def _handler(*args):
+            self.counts[name] += 1
+            self.last[name] = args
+
+        return _handler
+
+
+@pytest.fixture
+def clock():
+    """Provide a fake clock at a fixed, non-zero start time."""
+    return FakeClock()
+
+
+@pytest.fixture
+def events():
+    """Provide a fresh EventRecorder."""
+    return EventRecorder()
@@ -1,163 +1,193 @@
 """Tests for flag cache."""
 
 import pytest
+import threading
 import time
-import tempfile
-import os
-from pathlib import Path
-from rollgate.cache import FlagCache, CacheConfig
+from rollgate.cache import FlagCache, CacheConfig, CacheStats, InMemoryStorage
 
 
 @pytest.fixture
-def cache():
-    """Create a cache with fast TTLs for testing."""
+def cache(clock):
+    """Create a cache with fast TTLs driven by a fake clock."""
     config = CacheConfig(
         ttl_ms=100,  # 100ms fresh
         stale_ttl_ms=500,  # 500ms stale
+        time_source=clock,
     )
     return FlagCache(config)
 
 
+def _lookup(cache, key="flags"):
+    """Return (flags, stale) for a cache hit, or None for a miss."""
+    result = cache.get(key)
+    return None if result is None else (result.flags, result.stale)
+
+
+SET_A = ("set", "flags", {"a": True})
+
+# (ops, call, expected): ops run in order against the cache ("advance" moves
+# the fake clock by N ms), then call(cache) must equal expected.
+CACHE_SCENARIOS = [
+    pytest.param([], _lookup, None, id="empty-miss"),
+    pytest.param(
+        [("set", "flags", {"a": True, "b": False})],
+        _lookup,
+        ({"a": True, "b": False}, False),
+        id="fresh-hit",
+    ),
+    pytest.param([SET_A, ("advance", 150)], _lookup, ({"a": True}, True), id="stale-after-ttl"),
+    pytest.param([SET_A, ("advance", 600)], _lookup, None, id="expired-after-stale-ttl"),
+    pytest.param([], lambda c: c.has_fresh("flags"), False, id="has-fresh-empty"),
+    pytest.param([SET_A], lambda c: c.has_fresh("flags"), True, id="has-fresh-set"),
+    pytest.param(
+        [SET_A, ("advance", 150)], lambda c: c.has_fresh("flags"), False, id="has-fresh-stale"
+    ),
+    pytest.param([], lambda c: c.has_any("flags"), False, id="has-any-empty"),
+    pytest.param(
+        [SET_A, ("advance", 150)], lambda c: c.has_any("flags"), True, id="has-any-stale"
+    ),
+    pytest.param(
+        [SET_A, ("advance", 650)], lambda c: c.has_any("flags"), False, id="has-any-expired"
+    ),
+    pytest.param(
+        [SET_A, ("set", "other", {"b": False}), ("clear",)],
+        lambda c: (_lookup(c, "flags"), _lookup(c, "other")),
+        (None, None),
+        id="clear",
+    ),
+    pytest.param(
+        [("get", "flags"), SET_A, ("get", "flags")],
+        FlagCache.get_stats,
+        CacheStats(hits=1, misses=1, stale_hits=0, size=1),
+        id="stats",
+    ),
+    pytest.param(
+        [SET_A, ("advance", 150), ("get", "flags")],
+        FlagCache.get_stats,
+        CacheStats(hits=0, misses=0, stale_hits=1, size=1),
+        id="stale-hit-stats",
+    ),
+    pytest.param([], lambda c: c.get_hit_rate(), 0.0, id="hit-rate-empty"),
+    pytest.param(
+        [("get", "flags"), SET_A, ("get", "flags")],
+        lambda c: c.get_hit_rate(),
+        0.5,
+        id="hit-rate",
+    ),
+]
+
+
 class TestFlagCache:
     """Tests for FlagCache class."""
 
-    def test_get_returns_none_for_empty_cache(self, cache):
-        """Should return None for empty cache."""
-        result = cache.get("flags")
-        assert result is None
-
-    def test_set_and_get_fresh_data(self, cache):
-        """Should store and retrieve fresh data."""
-        flags = {"feature-a": True, "feature-b": False}
-        cache.set("flags", flags)
+    @pytest.mark.parametrize("ops,call,expected", CACHE_SCENARIOS)
+    def test_cache_behavior(self, cache, clock, ops, call, expected):
+        """Cache lookups, TTL transitions and stats follow the scenario table."""
+        for name, *args in ops:
+            if name == "advance":
+                clock.advance(*args)
+            else:
+                getattr(cache, name)(*args)
 
-        result = cache.get("flags")
-        assert result is not None
-        assert result.flags == flags
-        assert result.stale is False
+        assert call(cache) == expected
 
-    def test_data_becomes_stale_after_ttl(self, cache):
-        """Data should be marked stale after TTL."""
-        flags = {"feature-a": True}
-        cache.set("flags", flags)
+    def test_real_clock_staleness(self):
+        """Default wall-clock time source drives TTL transitions."""
+        cache = FlagCache(CacheConfig(ttl_ms=10, stale_ttl_ms=1000))
+        cache.set("flags", {"a": True})
 
-        # Wait for TTL to expire
-        time.sleep(0.15)
+        time.sleep(0.02)
 
         result = cache.get("flags")
         assert result is not None
-        assert result.flags == flags
         assert result.stale is True
 
-    def test_data_expires_after_stale_ttl(self, cache):
-        """Data should expire after stale TTL."""
-        flags = {"feature-a": True}
-        cache.set("flags", flags)
-
-        # Wait for stale TTL to expire
-        time.sleep(0.6)
 
-        result = cache.get("flags")
-        assert result is None
+class TestCacheStatsConcurrency:
+    """Tests for reading stats while other threads use the cache."""
 
-    def test_has_fresh_returns_correct_value(self, cache):
-        """has_fresh should return correct value."""
-        assert cache.has_fresh("flags") is False
+    def test_stats_are_lock_free_under_contention(self, clock):
+        """Stats can be read while readers hammer the cache from other threads.
 
+        The counters are updated without a lock, so concurrent increments may
+        be lost; the only guarantees are that nothing raises and no count
+        exceeds the number of lookups made.
+        """
+        cache = FlagCache(CacheConfig(ttl_ms=60000, stale_ttl_ms=120000, time_source=clock))
         cache.set("flags", {"a": True})
-        assert cache.has_fresh("flags") is True
-
-        time.sleep(0.15)
-        assert cache.has_fresh("flags") is False
-
-    def test_has_any_returns_correct_value(self, cache):
-        """has_any should return correct value."""
-        assert cache.has_any("flags") is False
-
-        cache.set("flags", {"a": True})
-        assert cache.has_any("flags") is True
-
-        time.sleep(0.15)  # After TTL but before stale TTL
-        assert cache.has_any("flags") is True
-
-        time.sleep(0.5)  # After stale TTL
-        assert cache.has_any("flags") is False
-
-    def test_clear_removes_all_data(self, cache):
-        """clear should remove all data."""
-        cache.set("flags", {"a": True})
-        cache.set("other", {"b": False})
-
-        cache.clear()
-
-        assert cache.get("flags") is None
-        assert cache.get("other") is None
-
-    def test_stats_tracking(self, cache):
-        """Should track cache statistics."""
-        # Miss
-        cache.get("flags")
-
-        # Set and hit
-        cache.set("flags", {"a": True})
-        cache.get("flags")
-
+        gate = threading.Event()
+        errors = []
+        readers, lookups = 4, 2000
+
+        def run(work):
+            gate.wait()
+            try:
+                work()
+            except Exception as exc:  # surfaced by the assertion below
+                errors.append(exc)
+
+        def read():
+            for _ in range(lookups):
+                cache.get("flags")
+                cache.get("missing")
+
+        def poll():
+            for _ in range(lookups):
+                cache.get_stats()
+                cache.get_hit_rate()
+
+        threads = [threading.Thread(target=run, args=(read,)) for _ in range(readers)]
+        threads.append(threading.Thread(target=run, args=(poll,)))
+        for t in threads:
+            t.start()
+        gate.set()
+        for t in threads:
+            t.join()
+
+        assert errors == []
         stats = cache.get_stats()
-        assert stats.hits == 1
-        assert stats.misses == 1
+        assert stats.hits <= readers * lookups
+        assert stats.misses <= readers * lookups
         assert stats.size == 1
 
-    def test_stale_hits_tracking(self, cache):
-        """Should track stale hits."""
-        cache.set("flags", {"a": True})
-        time.sleep(0.15)  # Make stale
-
-        cache.get("flags")
-
-        stats = cache.get_stats()
-        assert stats.stale_hits == 1
-
-    def test_hit_rate_calculation(self, cache):
-        """Should calculate hit rate correctly."""
-        assert cache.get_hit_rate() == 0.0
-
-        cache.get("flags")  # Miss
-        cache.set("flags", {"a": True})
-        cache.get("flags")  # Hit
-
-        # 1 hit / 2 total = 0.5
-        assert cache.get_hit_rate() == 0.5
-
 
 class TestCachePersistence:
     """Tests for cache persistence."""
 
     def test_persist_and_load(self):
-        """Should persist and load cache from file."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            cache_path = os.path.join(tmpdir, "cache.json")
-
-            # Create and persist cache
-            config = CacheConfig(
-                ttl_ms=60000,
-                stale_ttl_ms=120000,
-                persist_path=cache_path,
-            )
-            cache1 = FlagCache(config)
-            cache1.set("flags", {"a": True, "b": False})
-            cache1.close()
-
-            # Verify file exists
-            assert Path(cache_path).exists()
-
-            # Load in new cache instance
-            cache2 = FlagCache(config)
-            loaded = cache2.load()
-
-            assert loaded is True
-            result = cache2.get("flags")
-            assert result is not None
-            assert result.flags == {"a": True, "b": False}
+        """Should persist and load every cache entry through the storage backend."""
+        storage = InMemoryStorage()
+        config = CacheConfig(
+            ttl_ms=60000,
+            stale_ttl_ms=120000,
+            storage=storage,
+        )
+        cache1 = FlagCache(config)
+        cache1.set("flags", {"a": True, "b": False})
+        cache1.set("other", {"c": True})
+        cache1.close()
+
+        assert storage.data is not None
+
+        # Load in new cache instance
+        cache2 = FlagCache(config)
+        loaded = cache2.load()
+
+        assert loaded is True
+        assert cache2.get_stats().size == 2
+        assert _lookup(cache2, "flags") == ({"a": True, "b": False}, False)
+        assert _lookup(cache2, "other") == ({"c": True}, False)
+
+    def test_persist_and_load_empty(self):
+        """Should load a persisted empty cache successfully."""
+        storage = InMemoryStorage()
+        config = CacheConfig(storage=storage)
+        FlagCache(config).close()
+
+        cache = FlagCache(config)
+
+        assert cache.load() is True
+        assert cache.get_stats().size == 0
 
     def test_load_nonexistent_file(self):
         """Should return False for nonexistent file."""
@@ -167,62 +197,53 @@ class TestCachePersistence:
         result = cache.load()
         assert result is False
 
-    def test_expired_data_not_loaded(self):
-        """Should not load expired data from file."""
-        with tempfile.TemporaryDirectory() as tmpdir:
-            cache_path = os.path.join(tmpdir, "cache.json")
-
-            # Create cache with very short TTL
-            config = CacheConfig(
-                ttl_ms=10,
-                stale_ttl_ms=50,
-                persist_path=cache_path,
-            )
-            cache1 = FlagCache(config)
-            cache1.set("flags", {"a": True})
-            cache1.close()
-
-            # Wait for stale TTL
-            time.sleep(0.1)
-
-            # Load - should not restore expired data
-            cache2 = FlagCache(config)
-            cache2.load()
-
-            result = cache2.get("flags")
-            assert result is None
+    def test_expired_data_not_loaded(self, clock):
+        """Should not load expired data from storage."""
+        config = CacheConfig(
+            ttl_ms=10,
+            stale_ttl_ms=50,
+            storage=InMemoryStorage(),
+            time_source=clock,
+        )
+        cache1 = FlagCache(config)
+        cache1.set("flags", {"a": True})
+        cache1.close()
+
+        clock.advance(100)
+
+        # Load - should not restore expired data
+        cache2 = FlagCache(config)
+        cache2.load()
+
+        result = cache2.get("flags")
+        assert result is None
 
 
 class TestCacheEvents:
     """Tests for cache events."""
 
-    def test_cache_hit_event(self, cache):
+    def test_cache_hit_event(self, cache, events):
         """Should emit cache_hit event."""
-        events = []
-        cache.on("cache_hit", lambda *args: events.append(("hit", args)))
+        cache.on("cache_hit", events.handler("hit"))
 
         cache.set("flags", {"a": True})
         cache.get("flags")
 
-        assert len(events) == 1
-        assert events[0][0] == "hit"
+        assert events.counts["hit"] == 1
 
-    def test_cache_miss_event(self, cache):
+    def test_cache_miss_event(self, cache, events):
         """Should emit cache_miss event."""
-        events = []
-        cache.on("cache_miss", lambda *args: events.append(("miss", args)))
+        cache.on("cache_miss", events.handler("miss"))
 
         cache.get("flags")
 
-        assert len(events) == 1
-        assert events[0][0] == "miss"
+        assert events.counts["miss"] == 1
 
-    def test_cache_set_event(self, cache):
+    def test_cache_set_event(self, cache, events):
         """Should emit cache_set event."""
-        events = []
-        cache.on("cache_set", lambda *args: events.append(("set", args)))
+        cache.on("cache_set", events.handler("set"))
 
         cache.set("flags", {"a": True, "b": False})
 
-        assert len(events) == 1
-        assert events[0][0] == "set"
+        assert events.counts["set"] == 1
+        assert events.last["set"] == ("flags", 2)
@@ -2,26 +2,42 @@
 
 import pytest
 import asyncio
+import contextlib
 from rollgate.circuit_breaker import (
     CircuitBreaker,
     CircuitBreakerConfig,
+    CircuitBreakerStats,
     CircuitState,
     CircuitOpenError,
 )
 
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
 
 @pytest.fixture
-def circuit_breaker():
-    """Create a circuit breaker with fast timeouts for testing."""
+def circuit_breaker(clock):
+    """Create a circuit breaker with fast timeouts driven by a fake clock."""
     config = CircuitBreakerConfig(
         failure_threshold=3,
         recovery_timeout_ms=100,
         monitoring_window_ms=1000,
         success_threshold=2,
+        time_source=clock,
     )
     return CircuitBreaker(config)
 
 
+async def failure():
+    raise RuntimeError("fail")
+
+
+async def trip_open(cb, threshold=3):
+    """Fail enough requests to open the circuit."""
+    for _ in range(threshold):
+        with contextlib.suppress(RuntimeError):
+            await cb.execute(failure)
+
+
 class TestCircuitBreaker:
     """Tests for CircuitBreaker class."""
 
@@ -42,9 +58,6 @@ class TestCircuitBreaker:
     async def test_failures_open_circuit(self, circuit_breaker):
         """Enough failures should open the circuit."""
 
-        async def failure():
-            raise Exception("fail")
-
         # Cause failures up to threshold
         for _ in range(3):
             with pytest.raises(Exception):
@@ -55,13 +68,7 @@ class TestCircuitBreaker:
     async def test_open_circuit_rejects_requests(self, circuit_breaker):
         """Open circuit should reject requests immediately."""
 
-        async def failure():
-            raise Exception("fail")
-
-        # Open the circuit
-        for _ in range(3):
-            with pytest.raises(Exception):
-                await circuit_breaker.execute(failure)
+        await trip_open(circuit_breaker)
 
         # Next request should fail with CircuitOpenError
         async def success():
@@ -70,21 +77,14 @@ class TestCircuitBreaker:
         with pytest.raises(CircuitOpenError):
             await circuit_breaker.execute(success)
 
-    async def test_circuit_transitions_to_half_open(self, circuit_breaker):
+    async def test_circuit_transitions_to_half_open(self, circuit_breaker, clock):
         """Circuit should transition to half-open after recovery timeout."""
 
-        async def failure():
-            raise Exception("fail")
-
-        # Open the circuit
-        for _ in range(3):
-            with pytest.raises(Exception):
-                await circuit_breaker.execute(failure)
+        await trip_open(circuit_breaker)
 
         assert circuit_breaker.state == CircuitState.OPEN
 
-        # Wait for recovery timeout
-        await asyncio.sleep(0.15)
+        clock.advance(150)
 
         # Next request should be allowed (half-open state)
         async def success():
@@ -94,18 +94,12 @@ class TestCircuitBreaker:
         assert result == "ok"
         assert circuit_breaker.state == CircuitState.HALF_OPEN
 
-    async def test_half_open_closes_on_success(self, circuit_breaker):
+    async def test_half_open_closes_on_success(self, circuit_breaker, clock):
         """Circuit should close after enough successes in half-open."""
 
-        async def failure():
-            raise Exception("fail")
+        await trip_open(circuit_breaker)
 
-        # Open the circuit
-        for _ in range(3):
-            with pytest.raises(Exception):
-                await circuit_breaker.execute(failure)
-
-        await asyncio.sleep(0.15)
+        clock.advance(150)
 
         async def success():
             return "ok"
@@ -117,18 +111,12 @@ class TestCircuitBreaker:
         await circuit_breaker.execute(success)
         assert circuit_breaker.state == CircuitState.CLOSED
 
-    async def test_half_open_reopens_on_failure(self, circuit_breaker):
+    async def test_half_open_reopens_on_failure(self, circuit_breaker, clock):
         """Circuit should reopen on failure in half-open state."""
 
-        async def failure():
-            raise Exception("fail")
-
-        # Open the circuit
-        for _ in range(3):
-            with pytest.raises(Exception):
-                await circuit_breaker.execute(failure)
+        await trip_open(circuit_breaker)
 
-        await asyncio.sleep(0.15)
+        clock.advance(150)
 
         async def success():
             return "ok"
@@ -146,13 +134,7 @@ class TestCircuitBreaker:
     async def test_force_reset(self, circuit_breaker):
         """Force reset should close the circuit."""
 
-        async def failure():
-            raise Exception("fail")
-
-        # Open the circuit
-        for _ in range(3):
-            with pytest.raises(Exception):
-                await circuit_breaker.execute(failure)
+        await trip_open(circuit_breaker)
 
         assert circuit_breaker.state == CircuitState.OPEN
 
@@ -166,34 +148,40 @@ class TestCircuitBreaker:
         circuit_breaker.force_open()
         assert circuit_breaker.state == CircuitState.OPEN
 
-    async def test_get_stats(self, circuit_breaker):
+    async def test_get_stats(self, circuit_breaker, clock):
         """Should return correct statistics."""
 
-        async def failure():
-            raise Exception("fail")
-
         with pytest.raises(Exception):
             await circuit_breaker.execute(failure)
 
-        stats = circuit_breaker.get_stats()
-        assert stats.state == CircuitState.CLOSED
-        assert stats.failures == 1
-        assert stats.last_failure_time is not None
+        assert circuit_breaker.get_stats() == CircuitBreakerStats(
+            state=CircuitState.CLOSED,
+            failures=1,
+            last_failure_time=clock() * 1000,
+            half_open_successes=0,
+        )
 
-    async def test_is_allowing_requests(self, circuit_breaker):
+    async def test_is_allowing_requests(self, circuit_breaker, clock):
         """Should correctly report if requests are allowed."""
         assert circuit_breaker.is_allowing_requests() is True
 
-        async def failure():
-            raise Exception("fail")
-
-        # Open circuit
-        for _ in range(3):
-            with pytest.raises(Exception):
-                await circuit_breaker.execute(failure)
+        await trip_open(circuit_breaker)
 
         assert circuit_breaker.is_allowing_requests() is False
 
         # After recovery timeout
-        await asyncio.sleep(0.15)
+        clock.advance(150)
+        assert circuit_breaker.is_allowing_requests() is True
+
+    async def test_real_clock_recovery(self):
+        """Default wall-clock time source drives the recovery timeout."""
+        circuit_breaker = CircuitBreaker(
+            CircuitBreakerConfig(failure_threshold=1, recovery_timeout_ms=20)
+        )
+
+        with pytest.raises(Exception):
+            await circuit_breaker.execute(failure)
+        assert circuit_breaker.is_allowing_requests() is False
+
+        await asyncio.sleep(0.03)
         assert circuit_breaker.is_allowing_requests() is True
@@ -1,27 +1,83 @@
 """Tests for Rollgate client."""
 
+import dataclasses
 import pytest
+import pytest_asyncio
 import httpx
 import respx
 from rollgate import RollgateClient, RollgateConfig, UserContext
 from rollgate.circuit_breaker import CircuitState
+from rollgate.retry import RetryConfig
 
 
-@pytest.fixture
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+
+@pytest.fixture(scope="module")
 def mock_api():
-    """Mock API responses."""
-    with respx.mock:
-        yield respx
+    """Mock API responses, shared across the module."""
+    with respx.mock(assert_all_called=False) as router:
+        yield router
+
+
+@pytest.fixture(autouse=True)
+def _reset_respx(mock_api):
+    """Drop routes and recorded calls left by the previous test."""
+    mock_api.clear()
+    mock_api.reset()
+    yield
+
+
+FLAGS_URL = httpx.URL("https://api.rollgate.io/api/v1/sdk/flags")
+
+
+def flags_response(flags):
+    """Build a 200 flags response. Responses can be reused across requests."""
+    return httpx.Response(200, json={"flags": flags})
+
+
+# Bodies shared by several tests, encoded once at import.
+RESP_EMPTY = flags_response({})
+RESP_FEATURE_A = flags_response({"feature-a": True})
+RESP_A_TRUE = flags_response({"a": True})
+
+
+def mock_flags(mock_api, flags):
+    """Register the flags route with a single payload (dict or prebuilt response)."""
+    if not isinstance(flags, httpx.Response):
+        flags = flags_response(flags)
+    return mock_api.get(FLAGS_URL).mock(return_value=flags)
+
+
+def flags_route(mock_api, *payloads):
+    """Register one flags route that serves each payload in turn."""
+    return mock_api.get(FLAGS_URL).mock(
+        side_effect=[flags_response(p) for p in payloads]
+    )
+
+
+# The client never mutates its config, so every test can share one instance.
+_BASE_CONFIG = RollgateConfig(
+    api_key="test-api-key",
+    base_url="https://api.rollgate.io",
+    refresh_interval_ms=0,  # Disable polling for tests
+)
 
 
 @pytest.fixture
 def config():
-    """Create test configuration."""
-    return RollgateConfig(
-        api_key="test-api-key",
-        base_url="https://api.rollgate.io",
-        refresh_interval_ms=0,  # Disable polling for tests
-    )
+    """Shared read-only test configuration."""
+    return _BASE_CONFIG
+
+
+@pytest_asyncio.fixture(scope="module", loop_scope="module")
+async def ready_client(mock_api):
+    """An initialized client shared by tests that only read steady state."""
+    flags_route(mock_api, {"known-flag": True})
+    client = RollgateClient(_BASE_CONFIG)
+    await client.init()
+    yield client
+    await client.close()
 
 
 class TestRollgateClient:
@@ -29,18 +85,12 @@ class TestRollgateClient:
 
     async def test_init_fetches_flags(self, mock_api, config):
         """init() should fetch flags from API."""
-        mock_api.get("https://api.rollgate.io/api/v1/sdk/flags").mock(
-            return_value=httpx.Response(
-                200,
-                json={"flags": {"feature-a": True, "feature-b": False}},
-            )
-        )
+        mock_flags(mock_api, {"feature-a": True, "feature-b": False})
 
         client = RollgateClient(config)
         await client.init()
 
-        assert client.is_enabled("feature-a") is True
-        assert client.is_enabled("feature-b") is False
+        assert client.get_all_flags() == {"feature-a": True, "feature-b": False}
 
         await client.close()
 
@@ -51,29 +101,15 @@ class TestRollgateClient:
         assert client.is_enabled("feature-a") is False
         assert client.is_enabled("feature-a", default_value=True) is True
 
-    async def test_is_enabled_returns_default_for_unknown_flag(self, mock_api, config):
+    async def test_is_enabled_returns_default_for_unknown_flag(self, ready_client):
         """is_enabled should return default for unknown flags."""
-        mock_api.get("https://api.rollgate.io/api/v1/sdk/flags").mock(
-            return_value=httpx.Response(
-                200,
-                json={"flags": {"known-flag": True}},
-            )
-        )
-
-        client = RollgateClient(config)
-        await client.init()
-
-        assert client.is_enabled("unknown-flag") is False
-        assert client.is_enabled("unknown-flag", default_value=True) is True
-
-        await client.close()
+        assert ready_client.is_enabled("unknown-flag") is False
+        assert ready_client.is_enabled("unknown-flag", default_value=True) is True
 
     async def test_get_all_flags(self, mock_api, config):
         """get_all_flags should return all flags."""
         flags = {"feature-a": True, "feature-b": False, "feature-c": True}
-        mock_api.get("https://api.rollgate.io/api/v1/sdk/flags").mock(
-            return_value=httpx.Response(200, json={"flags": flags})
-        )
+        mock_flags(mock_api, flags)
 
         client = RollgateClient(config)
         await client.init()
@@ -84,132 +120,105 @@ class TestRollgateClient:
 
     async def test_identify_refetches_flags(self, mock_api, config):
         """identify() should refetch flags with user context."""
-        mock_api.get("https://api.rollgate.io/api/v1/sdk/flags").mock(
-            return_value=httpx.Response(
-                200,
-                json={"flags": {"feature-a": False}},
-            )
-        )
+        flags_route(mock_api, {"feature-a": False}, {"feature-a": True})
 
         client = RollgateClient(config)
         await client.init()
-        assert client.is_enabled("feature-a") is False
-
-        # Update mock for user-specific response
-        mock_api.get("https://api.rollgate.io/api/v1/sdk/flags").mock(
-            return_value=httpx.Response(
-                200,
-                json={"flags": {"feature-a": True}},
-            )
-        )
+        assert client.get_all_flags() == {"feature-a": False}
 
         await client.identify(UserContext(id="user-123", email="test@example.com"))
-        assert client.is_enabled("feature-a") is True
+        assert client.get_all_flags() == {"feature-a": True}
 
         await client.close()
 
     async def test_refresh_fetches_new_flags(self, mock_api, config):
         """refresh() should fetch new flags."""
-        mock_api.get("https://api.rollgate.io/api/v1/sdk/flags").mock(
-            return_value=httpx.Response(
-                200,
-                json={"flags": {"feature-a": False}},
-            )
-        )
+        flags_route(mock_api, {"feature-a": False}, {"feature-a": True})
 
         client = RollgateClient(config)
         await client.init()
-        assert client.is_enabled("feature-a") is False
-
-        # Update mock
-        mock_api.get("https://api.rollgate.io/api/v1/sdk/flags").mock(
-            return_value=httpx.Response(
-                200,
-                json={"flags": {"feature-a": True}},
-            )
-        )
+        assert client.get_all_flags() == {"feature-a": False}
 
         await client.refresh()
-        assert client.is_enabled("feature-a") is True
+        assert client.get_all_flags() == {"feature-a": True}
 
         await client.close()
 
     async def test_context_manager(self, mock_api, config):
         """Should work as async context manager."""
-        mock_api.get("https://api.rollgate.io/api/v1/sdk/flags").mock(
-            return_value=httpx.Response(
-                200,
-                json={"flags": {"feature-a": True}},
-            )
-        )
+        mock_flags(mock_api, RESP_FEATURE_A)
 
         async with RollgateClient(config) as client:
-            assert client.is_enabled("feature-a") is True
+            assert client.get_all_flags() == {"feature-a": True}
+
+
+# Per-test responses for the shared MockTransport, keyed on URL path.
+ROUTES = {}
+
+
+@pytest.fixture(scope="module")
+def transport():
+    """One MockTransport shared by every client in the module."""
+
+    def handler(request):
+        return ROUTES.get(request.url.path, httpx.Response(404))
+
+    return httpx.MockTransport(handler)
+
+
+class TestTransportInjection:
+    """Tests for RollgateConfig.transport."""
+
+    async def test_transport_serves_flags(self, transport):
+        """Requests go through the configured transport instead of the network."""
+        ROUTES.clear()
+        ROUTES[FLAGS_URL.path] = RESP_FEATURE_A
+        config = dataclasses.replace(_BASE_CONFIG, transport=transport)
+
+        async with RollgateClient(config) as client:
+            assert client.get_all_flags() == {"feature-a": True}
 
 
 class TestClientEvents:
     """Tests for client events."""
 
-    async def test_ready_event(self, mock_api, config):
+    async def test_ready_event(self, mock_api, config, events):
         """Should emit ready event after init."""
-        mock_api.get("https://api.rollgate.io/api/v1/sdk/flags").mock(
-            return_value=httpx.Response(200, json={"flags": {}})
-        )
+        mock_flags(mock_api, RESP_EMPTY)
 
-        events = []
         client = RollgateClient(config)
-        client.on("ready", lambda: events.append("ready"))
+        client.on("ready", events.handler("ready"))
 
         await client.init()
 
-        assert "ready" in events
+        assert events.counts["ready"] == 1
         await client.close()
 
-    async def test_flags_updated_event(self, mock_api, config):
+    async def test_flags_updated_event(self, mock_api, config, events):
         """Should emit flags_updated event."""
-        mock_api.get("https://api.rollgate.io/api/v1/sdk/flags").mock(
-            return_value=httpx.Response(
-                200,
-                json={"flags": {"a": True}},
-            )
-        )
+        mock_flags(mock_api, RESP_A_TRUE)
 
-        events = []
         client = RollgateClient(config)
-        client.on("flags_updated", lambda flags: events.append(flags))
+        client.on("flags_updated", events.handler("flags_updated"))
 
         await client.init()
 
-        assert len(events) >= 1
-        assert events[-1] == {"a": True}
+        assert events.counts["flags_updated"] >= 1
+        assert events.last["flags_updated"] == ({"a": True},)
         await client.close()
 
-    async def test_flag_changed_event(self, mock_api, config):
+    async def test_flag_changed_event(self, mock_api, config, events):
         """Should emit flag_changed event when flag changes."""
-        mock_api.get("https://api.rollgate.io/api/v1/sdk/flags").mock(
-            return_value=httpx.Response(
-                200,
-                json={"flags": {"a": False}},
-            )
-        )
+        flags_route(mock_api, {"a": False}, {"a": True})
 
-        events = []
         client = RollgateClient(config)
-        client.on("flag_changed", lambda key, new, old: events.append((key, new, old)))
+        client.on("flag_changed", events.handler("flag_changed"))
 
         await client.init()
 
-        # Update mock
-        mock_api.get("https://api.rollgate.io/api/v1/sdk/flags").mock(
-            return_value=httpx.Response(
-                200,
-                json={"flags": {"a": True}},
-            )
-        )
-
         await client.refresh()
 
-        assert ("a", True, False) in events
+        assert events.last["flag_changed"] == ("a", True, False)
         await client.close()
 
 
@@ -218,7 +227,7 @@ class TestClientErrorHandling:
 
     async def test_handles_401_error(self, mock_api, config):
         """Should handle 401 authentication error."""
-        mock_api.get("https://api.rollgate.io/api/v1/sdk/flags").mock(
+        mock_api.get(FLAGS_URL).mock(
             return_value=httpx.Response(401, json={"error": "Unauthorized"})
         )
 
@@ -233,7 +242,7 @@ class TestClientErrorHandling:
 
     async def test_handles_network_error(self, mock_api, config):
         """Should handle network errors gracefully."""
-        mock_api.get("https://api.rollgate.io/api/v1/sdk/flags").mock(
+        mock_api.get(FLAGS_URL).mock(
             side_effect=httpx.ConnectError("Connection refused")
         )
 
@@ -244,62 +253,46 @@ class TestClientErrorHandling:
         assert client.is_enabled("feature-a") is False
         await client.close()
 
-
-class TestCircuitBreakerIntegration:
-    """Tests for circuit breaker integration."""
-
-    async def test_circuit_state_property(self, mock_api, config):
-        """Should expose circuit state."""
-        mock_api.get("https://api.rollgate.io/api/v1/sdk/flags").mock(
-            return_value=httpx.Response(200, json={"flags": {}})
+    async def test_transport_error_is_retried(self, mock_api, config):
+        """Transport failures are raised as NetworkError and retried."""
+        route = mock_api.get(FLAGS_URL).mock(
+            side_effect=[httpx.ConnectError(""), RESP_FEATURE_A]
+        )
+        config = dataclasses.replace(
+            config, retry=RetryConfig(max_retries=1, base_delay_ms=0)
         )
 
         client = RollgateClient(config)
         await client.init()
 
-        assert client.circuit_state == CircuitState.CLOSED
+        assert route.call_count == 2
+        assert client.is_enabled("feature-a") is True
         await client.close()
 
-    async def test_reset_circuit(self, mock_api, config):
-        """Should allow resetting circuit."""
-        mock_api.get("https://api.rollgate.io/api/v1/sdk/flags").mock(
-            return_value=httpx.Response(200, json={"flags": {}})
-        )
 
-        client = RollgateClient(config)
-        await client.init()
+class TestCircuitBreakerIntegration:
+    """Tests for circuit breaker integration."""
 
-        client.reset_circuit()
-        assert client.circuit_state == CircuitState.CLOSED
-        await client.close()
+    async def test_circuit_state_property(self, ready_client):
+        """Should expose circuit state."""
+        assert ready_client.circuit_state == CircuitState.CLOSED
+
+    async def test_reset_circuit(self, ready_client):
+        """Should allow resetting circuit."""
+        ready_client.reset_circuit()
+        assert ready_client.circuit_state == CircuitState.CLOSED
 
 
 class TestCacheIntegration:
     """Tests for cache integration."""
 
-    async def test_get_cache_stats(self, mock_api, config):
+    async def test_get_cache_stats(self, ready_client):
         """Should expose cache stats."""
-        mock_api.get("https://api.rollgate.io/api/v1/sdk/flags").mock(
-            return_value=httpx.Response(200, json={"flags": {}})
-        )
-
-        client = RollgateClient(config)
-        await client.init()
-
-        stats = client.get_cache_stats()
+        stats = ready_client.get_cache_stats()
         assert stats.size >= 0
-        await client.close()
 
-    async def test_clear_cache(self, mock_api, config):
+    async def test_clear_cache(self, ready_client):
         """Should allow clearing cache."""
-        mock_api.get("https://api.rollgate.io/api/v1/sdk/flags").mock(
-            return_value=httpx.Response(200, json={"flags": {}})
-        )
-
-        client = RollgateClient(config)
-        await client.init()
-
-        client.clear_cache()
-        stats = client.get_cache_stats()
+        ready_client.clear_cache()
+        stats = ready_client.get_cache_stats()
         assert stats.size == 0
-        await client.close()
@@ -4,6 +4,8 @@ import asyncio
 import pytest
 from rollgate.dedup import RequestDeduplicator, DedupConfig
 
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
 
 @pytest.fixture
 def dedup():
@@ -33,19 +35,21 @@ class TestRequestDeduplicator:
     async def test_concurrent_requests_deduplicated(self, dedup):
         """Test that concurrent identical requests are deduplicated."""
         call_count = 0
+        in_fetch = asyncio.Event()
+        gate = asyncio.Event()
 
         async def fetch():
             nonlocal call_count
             call_count += 1
-            await asyncio.sleep(0.1)  # Simulate network delay
+            in_fetch.set()
+            await gate.wait()
             return f"result-{call_count}"
 
-        # Launch multiple concurrent requests
-        results = await asyncio.gather(
-            dedup.dedupe("key1", fetch),
-            dedup.dedupe("key1", fetch),
-            dedup.dedupe("key1", fetch),
-        )
+        # Launch multiple concurrent requests and hold the fetch open
+        tasks = [asyncio.create_task(dedup.dedupe("key1", fetch)) for _ in range(3)]
+        await in_fetch.wait()
+        gate.set()
+        results = await asyncio.gather(*tasks)
 
         # All should get the same result
         assert results[0] == results[1] == results[2]
@@ -90,18 +94,22 @@ class TestRequestDeduplicator:
     async def test_error_propagation(self, dedup):
         """Test that errors are propagated to all waiters."""
         call_count = 0
+        in_fetch = asyncio.Event()
+        gate = asyncio.Event()
 
         async def fetch():
             nonlocal call_count
             call_count += 1
-            await asyncio.sleep(0.05)
+            in_fetch.set()
+            await gate.wait()
             raise ValueError("Test error")
 
+        tasks = [asyncio.create_task(dedup.dedupe("key1", fetch)) for _ in range(2)]
+        await in_fetch.wait()
+        gate.set()
+
         with pytest.raises(ValueError, match="Test error"):
-            await asyncio.gather(
-                dedup.dedupe("key1", fetch),
-                dedup.dedupe("key1", fetch),
-            )
+            await asyncio.gather(*tasks)
 
         # Only one actual call should be made
         assert call_count == 1
@@ -115,9 +123,7 @@ class TestRequestDeduplicator:
         async def fetch():
             nonlocal call_count
             call_count += 1
-            my_count = call_count  # Capture value before await
-            await asyncio.sleep(0.05)
-            return f"result-{my_count}"
+            return f"result-{call_count}"
 
         results = await asyncio.gather(
             dedup.dedupe("key1", fetch),
@@ -131,19 +137,25 @@ class TestRequestDeduplicator:
     @pytest.mark.asyncio
     async def test_stats(self, dedup):
         """Test statistics tracking."""
+        in_fetch = asyncio.Event()
+        gate = asyncio.Event()
+
         async def fetch():
-            await asyncio.sleep(0.05)
+            in_fetch.set()
+            await gate.wait()
             return "result"
 
         # First request
+        gate.set()
         await dedup.dedupe("key1", fetch)
 
         # Concurrent requests (will be deduplicated)
-        await asyncio.gather(
-            dedup.dedupe("key2", fetch),
-            dedup.dedupe("key2", fetch),
-            dedup.dedupe("key2", fetch),
-        )
+        gate.clear()
+        in_fetch.clear()
+        tasks = [asyncio.create_task(dedup.dedupe("key2", fetch)) for _ in range(3)]
+        await in_fetch.wait()
+        gate.set()
+        await asyncio.gather(*tasks)
 
         stats = dedup.get_stats()
 
@@ -154,23 +166,19 @@ class TestRequestDeduplicator:
     @pytest.mark.asyncio
     async def test_inflight_count(self, dedup):
         """Test inflight request counting."""
-        started = asyncio.Event()
-        continue_event = asyncio.Event()
+        release = asyncio.get_running_loop().create_future()
 
         async def fetch():
-            started.set()
-            await continue_event.wait()
-            return "result"
+            return await release
 
-        # Start a request
+        # Start a request and let it run up to the pending future
         task = asyncio.create_task(dedup.dedupe("key1", fetch))
-        await started.wait()
+        await asyncio.sleep(0)
 
-        # Check inflight count
         assert dedup.inflight_count == 1
 
         # Complete the request
-        continue_event.set()
+        release.set_result("result")
         await task
 
         # Should be 0 after completion
@@ -216,3 +224,29 @@ class TestRequestDeduplicator:
 
         assert stats["total_requests"] == 0
         assert stats["deduplicated_requests"] == 0
+
+    @pytest.mark.asyncio
+    async def test_expired_inflight_not_shared(self, clock):
+        """Test that an inflight request older than the TTL is not joined."""
+        dedup = RequestDeduplicator(DedupConfig(ttl_ms=5000, time_source=clock))
+        release = asyncio.Event()
+        call_count = 0
+
+        async def fetch():
+            nonlocal call_count
+            call_count += 1
+            await release.wait()
+            return "result"
+
+        first = asyncio.create_task(dedup.dedupe("key1", fetch))
+        await asyncio.sleep(0)
+
+        clock.advance(5001)
+        second = asyncio.create_task(dedup.dedupe("key1", fetch))
+        await asyncio.sleep(0)
+
+        release.set()
+        await asyncio.gather(first, second)
+
+        assert call_count == 2
+        assert dedup.get_stats()["deduplicated_requests"] == 0
@@ -0,0 +1,56 @@
+"""Fan-in scaling benchmark for request deduplication.
+
+Deselected by default; run with ``pytest -m benchmark``.
+"""
+
+import asyncio
+import time
+
+import pytest
+
+hypothesis = pytest.importorskip("hypothesis")
+from hypothesis import given, settings  # noqa: E402
+from hypothesis import strategies as st  # noqa: E402
+
+from rollgate.dedup import DedupConfig, RequestDeduplicator  # noqa: E402
+
+pytestmark = pytest.mark.benchmark
+
+
+async def _fan_in(n: int) -> None:
+    dedup = RequestDeduplicator(DedupConfig(enabled=True, ttl_ms=5000))
+    gate = asyncio.Event()
+    call_count = 0
+
+    async def fetch():
+        nonlocal call_count
+        call_count += 1
+        await gate.wait()
+        return "result"
+
+    start = time.perf_counter()
+    tasks = [asyncio.ensure_future(dedup.dedupe("key1", fetch)) for _ in range(n)]
+    # Let every caller reach either the fetch or the shared future
+    for _ in range(3):
+        await asyncio.sleep(0)
+    assert dedup.inflight_count == 1
+
+    gate.set()
+    results = await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - start
+
+    assert results == ["result"] * n
+    assert call_count == 1
+    assert dedup.inflight_count == 0
+    # Linear budget: a per-caller scan would blow through this at large n
+    assert elapsed < 0.05 + n * 5e-4
+
+
+class TestDedupFanIn:
+    """Property tests for wide concurrent fan-in."""
+
+    @settings(max_examples=25, deadline=None)
+    @given(n=st.integers(min_value=2, max_value=500))
+    def test_wide_fan_in(self, n):
+        """N concurrent callers share one fetch and finish in linear time."""
+        asyncio.run(_fan_in(n))
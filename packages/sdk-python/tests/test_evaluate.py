@@ -1,5 +1,10 @@
 """Tests for local flag evaluation."""
 
+import dataclasses
+import json
+import sys
+import threading
+
 import pytest
 from rollgate.evaluate import (
     Condition,
@@ -10,10 +15,13 @@ from rollgate.evaluate import (
     UserContext,
     evaluate_flag,
     evaluate_all_flags,
+    _compiled_regex,
+    _parse_version,
+    _rollout_bucket,
 )
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def user():
     """Create a test user context."""
     return UserContext(
@@ -55,6 +63,36 @@ class TestEvaluateFlag:
         other_user = UserContext(id="user-999")
         assert evaluate_flag(rule, other_user) is False
 
+    def test_target_user_skips_rollout_hash(self, user, monkeypatch):
+        """Test that a targeted user is resolved without hashing."""
+        import rollgate.evaluate as evaluate_module
+
+        def fail(*args):
+            raise AssertionError("rollout hash computed for targeted user")
+
+        monkeypatch.setattr(evaluate_module, "_rollout_bucket", fail)
+        rule = FlagRule(key="test", enabled=True, rollout=50, target_users=["user-123"])
+        assert evaluate_flag(rule, user) is True
+
+    def test_rules_cannot_drift_from_indexes(self):
+        """Test rule sequences are frozen and replace() rebuilds derived state."""
+        rule = make_rule("equals", "pro")
+        targeting_rule = rule.rules[0]
+        other_user = UserContext(id="b", attributes={"plan": "free"})
+
+        with pytest.raises(AttributeError):
+            rule.target_users.append("b")
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            rule.target_users = ["b"]
+        with pytest.raises(AttributeError):
+            targeting_rule.conditions.append(Condition("plan", "equals", "free"))
+
+        assert evaluate_flag(dataclasses.replace(rule, target_users=["b"]), other_user) is True
+        free_rule = dataclasses.replace(
+            targeting_rule, conditions=[Condition("plan", "equals", "free")]
+        )
+        assert evaluate_flag(dataclasses.replace(rule, rules=[free_rule]), other_user) is True
+
     def test_no_user_context(self):
         """Test evaluation without user context."""
         rule = FlagRule(key="test", enabled=True, rollout=50)
@@ -64,119 +102,90 @@ class TestEvaluateFlag:
         assert evaluate_flag(rule100, None) is True
 
 
-class TestConditionOperators:
-    """Tests for condition operators."""
-
-    @pytest.fixture
-    def make_rule(self):
-        """Helper to create rule with single condition."""
-        def _make(operator, cond_value, attr_name="plan"):
-            return FlagRule(
-                key="test",
+def make_rule(operator, cond_value, attr_name="plan"):
+    """Create a 0% rollout flag whose single rule has one condition."""
+    return FlagRule(
+        key="test",
+        enabled=True,
+        rollout=0,
+        rules=[
+            TargetingRule(
+                id="rule-1",
                 enabled=True,
-                rollout=0,
-                rules=[
-                    TargetingRule(
-                        id="rule-1",
-                        enabled=True,
-                        rollout=100,
-                        conditions=[
-                            Condition(attribute=attr_name, operator=operator, value=cond_value)
-                        ],
-                    )
+                rollout=100,
+                conditions=[
+                    Condition(attribute=attr_name, operator=operator, value=cond_value)
                 ],
             )
-        return _make
-
-    def test_equals(self, user, make_rule):
-        """Test equals operator."""
-        assert evaluate_flag(make_rule("equals", "pro"), user) is True
-        assert evaluate_flag(make_rule("equals", "free"), user) is False
-
-    def test_not_equals(self, user, make_rule):
-        """Test not_equals operator."""
-        assert evaluate_flag(make_rule("not_equals", "free"), user) is True
-        assert evaluate_flag(make_rule("not_equals", "pro"), user) is False
-
-    def test_contains(self, user, make_rule):
-        """Test contains operator."""
-        assert evaluate_flag(make_rule("contains", "example", "email"), user) is True
-        assert evaluate_flag(make_rule("contains", "gmail", "email"), user) is False
-
-    def test_not_contains(self, user, make_rule):
-        """Test not_contains operator."""
-        assert evaluate_flag(make_rule("not_contains", "gmail", "email"), user) is True
-        assert evaluate_flag(make_rule("not_contains", "example", "email"), user) is False
-
-    def test_starts_with(self, user, make_rule):
-        """Test starts_with operator."""
-        assert evaluate_flag(make_rule("starts_with", "test", "email"), user) is True
-        assert evaluate_flag(make_rule("starts_with", "admin", "email"), user) is False
-
-    def test_ends_with(self, user, make_rule):
-        """Test ends_with operator."""
-        assert evaluate_flag(make_rule("ends_with", ".com", "email"), user) is True
-        assert evaluate_flag(make_rule("ends_with", ".org", "email"), user) is False
-
-    def test_in(self, user, make_rule):
-        """Test in operator."""
-        assert evaluate_flag(make_rule("in", "free,pro,enterprise"), user) is True
-        assert evaluate_flag(make_rule("in", "free,basic"), user) is False
-
-    def test_not_in(self, user, make_rule):
-        """Test not_in operator."""
-        assert evaluate_flag(make_rule("not_in", "free,basic"), user) is True
-        assert evaluate_flag(make_rule("not_in", "free,pro"), user) is False
-
-    def test_is_set(self, user, make_rule):
+        ],
+    )
+
+
+# (operator, attribute, value that matches the user, value that does not)
+OPERATOR_CASES = [
+    pytest.param("equals", "plan", "pro", "free", id="equals"),
+    pytest.param("not_equals", "plan", "free", "pro", id="not_equals"),
+    pytest.param("contains", "email", "example", "gmail", id="contains"),
+    pytest.param("not_contains", "email", "gmail", "example", id="not_contains"),
+    pytest.param("starts_with", "email", "test", "admin", id="starts_with"),
+    pytest.param("ends_with", "email", ".com", ".org", id="ends_with"),
+    pytest.param("in", "plan", "free,pro,enterprise", "free,basic", id="in"),
+    pytest.param("not_in", "plan", "free,basic", "free,pro", id="not_in"),
+    pytest.param("greater_than", "age", "20", "30", id="greater_than"),
+    pytest.param("less_than", "age", "30", "20", id="less_than"),
+    pytest.param("greater_equal", "age", "25", "26", id="greater_equal"),
+    pytest.param("less_equal", "age", "25", "24", id="less_equal"),
+    pytest.param("regex", "email", r".*@example\.com", r".*@gmail\.com", id="regex"),
+    pytest.param("semver_gt", "version", "1.0.0", "2.0.0", id="semver_gt"),
+    pytest.param("semver_lt", "version", "2.0.0", "1.0.0", id="semver_lt"),
+    pytest.param("semver_eq", "version", "1.2.3", "1.2.4", id="semver_eq"),
+]
+
+
+class TestConditionOperators:
+    """Tests for condition operators."""
+
+    @pytest.mark.parametrize("operator,attr,match_value,miss_value", OPERATOR_CASES)
+    def test_operator(self, user, operator, attr, match_value, miss_value):
+        """Each operator matches one value and rejects the other."""
+        assert evaluate_flag(make_rule(operator, match_value, attr), user) is True
+        assert evaluate_flag(make_rule(operator, miss_value, attr), user) is False
+
+    def test_is_set(self, user):
         """Test is_set operator."""
         assert evaluate_flag(make_rule("is_set", ""), user) is True
         assert evaluate_flag(make_rule("is_set", "", "nonexistent"), user) is False
 
-    def test_is_not_set(self, user, make_rule):
+    def test_is_not_set(self, user):
         """Test is_not_set operator."""
         assert evaluate_flag(make_rule("is_not_set", "", "nonexistent"), user) is True
         assert evaluate_flag(make_rule("is_not_set", ""), user) is False
 
-    def test_greater_than(self, user, make_rule):
-        """Test greater_than operator."""
-        assert evaluate_flag(make_rule("greater_than", "20", "age"), user) is True
-        assert evaluate_flag(make_rule("greater_than", "30", "age"), user) is False
-
-    def test_less_than(self, user, make_rule):
-        """Test less_than operator."""
-        assert evaluate_flag(make_rule("less_than", "30", "age"), user) is True
-        assert evaluate_flag(make_rule("less_than", "20", "age"), user) is False
+    def test_invalid_regex(self, user):
+        """Test that an invalid pattern fails the condition instead of raising."""
+        assert evaluate_flag(make_rule("regex", r"([a-z", "email"), user) is False
 
-    def test_greater_equal(self, user, make_rule):
-        """Test greater_equal operator."""
-        assert evaluate_flag(make_rule("greater_equal", "25", "age"), user) is True
-        assert evaluate_flag(make_rule("greater_equal", "26", "age"), user) is False
+    def test_regex_backreference(self, user):
+        """Test that patterns outside RE2's syntax still evaluate."""
+        assert evaluate_flag(make_rule("regex", r"(\w)\1"), user) is False
+        assert evaluate_flag(make_rule("regex", r"p(r)\1?o"), user) is True
 
-    def test_less_equal(self, user, make_rule):
-        """Test less_equal operator."""
-        assert evaluate_flag(make_rule("less_equal", "25", "age"), user) is True
-        assert evaluate_flag(make_rule("less_equal", "24", "age"), user) is False
+    def test_semver_padding(self, user):
+        """Test that missing semver parts compare as zero."""
+        assert evaluate_flag(make_rule("semver_eq", "1.2.3.0", "version"), user) is True
+        assert evaluate_flag(make_rule("semver_lt", "1.2.3.1", "version"), user) is True
+        assert _parse_version("v1.2.3") == (1, 2, 3)
+        assert _parse_version("1.2.beta") is None
 
-    def test_regex(self, user, make_rule):
-        """Test regex operator."""
-        assert evaluate_flag(make_rule("regex", r".*@example\.com", "email"), user) is True
-        assert evaluate_flag(make_rule("regex", r".*@gmail\.com", "email"), user) is False
+    def test_unknown_operator(self, user):
+        """Test that an unrecognised operator never matches."""
+        assert evaluate_flag(make_rule("approximately", "pro"), user) is False
 
-    def test_semver_gt(self, user, make_rule):
-        """Test semver_gt operator."""
-        assert evaluate_flag(make_rule("semver_gt", "1.0.0", "version"), user) is True
-        assert evaluate_flag(make_rule("semver_gt", "2.0.0", "version"), user) is False
 
-    def test_semver_lt(self, user, make_rule):
-        """Test semver_lt operator."""
-        assert evaluate_flag(make_rule("semver_lt", "2.0.0", "version"), user) is True
-        assert evaluate_flag(make_rule("semver_lt", "1.0.0", "version"), user) is False
-
-    def test_semver_eq(self, user, make_rule):
-        """Test semver_eq operator."""
-        assert evaluate_flag(make_rule("semver_eq", "1.2.3", "version"), user) is True
-        assert evaluate_flag(make_rule("semver_eq", "1.2.4", "version"), user) is False
+@pytest.fixture(scope="module")
+def rollout_users():
+    """10,000 distinct users, built once and shared by distribution tests."""
+    return [UserContext(id=f"user-{i}") for i in range(10000)]
 
 
 class TestConsistentHashing:
@@ -191,20 +200,27 @@ class TestConsistentHashing:
         for _ in range(100):
             assert evaluate_flag(rule, user) == first_result
 
-    def test_distribution(self):
+    @pytest.mark.parametrize("rollout", [10, 50, 90])
+    def test_distribution(self, rollout_users, rollout):
         """Test that rollout distribution is roughly correct."""
-        rule = FlagRule(key="distribution-test", enabled=True, rollout=50)
+        rule = FlagRule(key="distribution-test", enabled=True, rollout=rollout)
 
-        true_count = 0
-        total = 10000
+        true_count = sum(evaluate_flag(rule, user) for user in rollout_users)
 
-        for i in range(total):
-            user = UserContext(id=f"user-{i}")
-            if evaluate_flag(rule, user):
-                true_count += 1
+        percentage = true_count / len(rollout_users) * 100
+        assert rollout - 5 <= percentage <= rollout + 5, f"Distribution was {percentage}%"
 
-        percentage = true_count / total * 100
-        assert 45 <= percentage <= 55, f"Distribution was {percentage}%"
+    @pytest.mark.parametrize(
+        "flag_key,user_id,bucket",
+        [
+            ("test-flag", "user-1", 49),
+            ("distribution-test", "user-42", 15),
+            ("checkout", "abc", 74),
+        ],
+    )
+    def test_bucket_matches_other_sdks(self, flag_key, user_id, bucket):
+        """Buckets are pinned so every SDK places a user identically."""
+        assert _rollout_bucket(flag_key, user_id) == bucket
 
 
 class TestEvaluateAllFlags:
@@ -228,6 +244,22 @@ class TestEvaluateAllFlags:
 class TestLocalEvaluator:
     """Tests for LocalEvaluator class."""
 
+    def test_set_rules_clears_rule_caches(self, user):
+        """Test that loading new rules drops compiled patterns from old ones."""
+        condition = Condition(attribute="email", operator="regex", value=r".*@example\.com")
+        rule = FlagRule(
+            key="test",
+            enabled=True,
+            rollout=0,
+            rules=[TargetingRule(id="r", enabled=True, rollout=100, conditions=[condition])],
+        )
+        assert evaluate_flag(rule, user) is True
+        assert _compiled_regex.cache_info().currsize > 0
+
+        LocalEvaluator().set_rules(RulesPayload(version="v2"))
+
+        assert _compiled_regex.cache_info().currsize == 0
+
     def test_set_rules(self, user):
         """Test setting rules."""
         evaluator = LocalEvaluator()
@@ -302,3 +334,155 @@ class TestLocalEvaluator:
 
         assert evaluator.version == "v2"
         assert evaluator.evaluate("feature-x", user) is True
+
+    def test_evaluate_memoizes_id_only_flags(self, user):
+        """Flags keyed only on user id are memoized until rules change."""
+        evaluator = LocalEvaluator()
+        evaluator.set_rules(RulesPayload(
+            version="v1",
+            flags={
+                "feature-a": FlagRule(
+                    key="feature-a", enabled=True, rollout=0, target_users=["user-123"]
+                ),
+            },
+        ))
+
+        assert evaluator.evaluate("feature-a", user) is True
+        assert evaluator._state.cache == {("feature-a", "user-123"): True}
+
+        evaluator.set_rules(RulesPayload(
+            version="v2",
+            flags={
+                "feature-a": FlagRule(
+                    key="feature-a", enabled=True, rollout=0, target_users=["someone-else"]
+                ),
+            },
+        ))
+
+        assert evaluator._state.cache == {}
+        assert evaluator.evaluate("feature-a", user) is False
+
+    def test_evaluate_while_rules_change(self):
+        """Memoized evaluation stays safe while another thread swaps rules."""
+        payload = RulesPayload(
+            version="v1",
+            flags={
+                f"f{i}": FlagRule(key=f"f{i}", enabled=True, rollout=0, target_users=["u1"])
+                for i in range(8)
+            },
+        )
+        evaluator = LocalEvaluator()
+        evaluator.set_rules(payload)
+        errors = []
+
+        def swap_rules():
+            try:
+                for _ in range(10000):
+                    evaluator.set_rules(payload)
+            except Exception as e:  # pragma: no cover - reported below
+                errors.append(e)
+
+        # Switch threads as often as possible to hit the get/move_to_end window
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        thread = threading.Thread(target=swap_rules)
+        thread.start()
+        try:
+            while thread.is_alive():
+                for i in range(8):
+                    assert evaluator.evaluate(f"f{i}", UserContext(id="u1")) is True
+        finally:
+            thread.join()
+            sys.setswitchinterval(interval)
+
+        assert errors == []
+
+    def test_set_rules_snapshots_flags(self, user):
+        """Replacing a flag in the caller's payload does not affect installed rules."""
+        payload = RulesPayload(
+            version="v1", flags={"feature-a": FlagRule(key="feature-a", enabled=False, rollout=0)}
+        )
+        evaluator = LocalEvaluator()
+        evaluator.set_rules(payload)
+
+        payload.flags["feature-a"] = FlagRule(key="feature-a", enabled=True, rollout=100)
+
+        assert evaluator.evaluate("feature-a", user) is False
+        assert evaluator.evaluate_all(user) == {"feature-a": False}
+
+    def test_attribute_rules_are_not_memoized(self):
+        """Same user id with different attributes is evaluated each time."""
+        evaluator = LocalEvaluator()
+        evaluator.set_rules_from_dict({
+            "version": "v1",
+            "flags": {
+                "pro-only": {
+                    "enabled": True,
+                    "rollout": 0,
+                    "rules": [{
+                        "id": "r",
+                        "enabled": True,
+                        "rollout": 100,
+                        "conditions": [
+                            {"attribute": "plan", "operator": "equals", "value": "pro"}
+                        ],
+                    }],
+                }
+            },
+        })
+
+        pro = UserContext(id="u", attributes={"plan": "pro"})
+        free = UserContext(id="u", attributes={"plan": "free"})
+
+        assert evaluator.evaluate("pro-only", pro) is True
+        assert evaluator.evaluate("pro-only", free) is False
+        assert evaluator._state.cache == {}
+
+    def test_unchanged_payload_is_skipped(self, user):
+        """Re-sending the same payload keeps rules and memoized results."""
+        payload = {
+            "version": "v1",
+            "flags": {"feature-a": {"enabled": True, "rollout": 0, "targetUsers": ["user-123"]}},
+        }
+        evaluator = LocalEvaluator()
+        evaluator.set_rules_from_dict(payload)
+        evaluator.evaluate("feature-a", user)
+        rules = evaluator._state.flags
+
+        evaluator.set_rules_from_dict(json.loads(json.dumps(payload)))
+
+        assert evaluator._state.flags is rules
+        assert evaluator._state.cache == {("feature-a", "user-123"): True}
+
+    def test_set_rules_from_bytes(self, user):
+        """Raw bodies are parsed once and identical bodies are ignored."""
+        raw = b'{"version": "v3", "flags": {"feature-a": {"enabled": true, "rollout": 100}}}'
+        evaluator = LocalEvaluator()
+        evaluator.set_rules_from_bytes(raw)
+        rules = evaluator._state.flags
+
+        evaluator.set_rules_from_bytes(bytes(raw))
+        assert evaluator._state.flags is rules
+        assert evaluator.version == "v3"
+        assert evaluator.evaluate("feature-a", user) is True
+
+        evaluator.set_rules_from_bytes(raw.replace(b"true", b"false"))
+        assert evaluator.evaluate("feature-a", user) is False
+
+    def test_user_independent_flags_are_constants(self, user):
+        """Disabled and fully rolled-out flags resolve without evaluation or caching."""
+        evaluator = LocalEvaluator()
+        evaluator.set_rules(RulesPayload(
+            version="v1",
+            flags={
+                "on": FlagRule(key="on", enabled=True, rollout=100),
+                "off": FlagRule(key="off", enabled=False, rollout=100, target_users=["user-123"]),
+                "half": FlagRule(key="half", enabled=True, rollout=50),
+            },
+        ))
+
+        assert evaluator._state.constants == {"on": True, "off": False}
+        assert evaluator.evaluate("on", user) is True
+        assert evaluator.evaluate("off", user) is False
+        assert evaluator.evaluate("on", None) is True
+        assert ("on", "user-123") not in evaluator._state.cache
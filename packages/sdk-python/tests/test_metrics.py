@@ -5,6 +5,7 @@ from rollgate.metrics import (
     SDKMetrics,
     RequestMetrics,
     CircuitStateValue,
+    WindowedStats,
     get_metrics,
     create_metrics,
 )
@@ -151,6 +152,21 @@ class TestSDKMetrics:
         assert snap.p95_latency_ms == pytest.approx(95, abs=5)
         assert snap.p99_latency_ms == pytest.approx(99, abs=2)
 
+    def test_latency_window_eviction(self, metrics):
+        """Test that latency stats cover only the most recent samples."""
+        for i in range(1, 1501):
+            metrics.record_request(RequestMetrics(
+                endpoint="/api",
+                status_code=200,
+                latency_ms=float(i),
+            ))
+
+        snap = metrics.snapshot()
+        assert snap.min_latency_ms == 501
+        assert snap.max_latency_ms == 1500
+        assert snap.avg_latency_ms == 1000.5
+        assert snap.p50_latency_ms == 1000
+
     def test_to_prometheus(self, metrics):
         """Test Prometheus format export."""
         metrics.record_request(RequestMetrics(
@@ -168,6 +184,22 @@ class TestSDKMetrics:
         assert "# HELP" in output
         assert "# TYPE" in output
 
+    def test_to_prometheus_values(self, metrics):
+        """Test that each series line carries its value under the given prefix."""
+        metrics.record_request(RequestMetrics(endpoint="/api", status_code=500, latency_ms=8.0))
+        metrics.record_circuit_state_change(CircuitStateValue.HALF_OPEN)
+
+        lines = metrics.to_prometheus("app").splitlines()
+
+        assert lines[:3] == [
+            "# HELP app_requests_total Total number of requests",
+            "# TYPE app_requests_total counter",
+            "app_requests_total 1",
+        ]
+        assert "app_requests_failed_total 1" in lines
+        assert "app_latency_avg_ms 8.0" in lines
+        assert "app_circuit_state 0.5" in lines
+
     def test_reset(self, metrics):
         """Test resetting all metrics."""
         metrics.record_request(RequestMetrics(
@@ -210,6 +242,27 @@ class TestSDKMetrics:
 
         assert len(events_received) == 1  # No new event
 
+    def test_no_snapshot_without_listeners(self, metrics, monkeypatch):
+        """Test that recording skips snapshot() when nobody is subscribed."""
+        def fail():
+            raise AssertionError("snapshot built with no listeners")
+
+        monkeypatch.setattr(metrics, "snapshot", fail)
+        metrics.record_request(RequestMetrics(endpoint="/api", status_code=200, latency_ms=5.0))
+        metrics.record_evaluation("flag-a", True)
+
+    def test_listener_can_unsubscribe_during_emit(self, metrics, events):
+        """Test that a listener removing itself does not skip the next one."""
+        def once(snap):
+            metrics.off("evaluation", once)
+
+        metrics.on("evaluation", once)
+        metrics.on("evaluation", events.handler("evaluation"))
+        metrics.record_evaluation("flag-a", True)
+        metrics.record_evaluation("flag-a", True)
+
+        assert events.counts["evaluation"] == 2
+
     def test_global_metrics(self):
         """Test global metrics instance."""
         m1 = get_metrics()
@@ -235,3 +288,23 @@ class TestSDKMetrics:
         assert snap.windows.five_minutes.requests == 5
         assert snap.windows.fifteen_minutes.requests == 5
         assert snap.windows.one_hour.requests == 5
+
+    def test_time_windows_expire(self, clock):
+        """Test that requests age out of each window as the clock advances."""
+        metrics = SDKMetrics(time_source=clock)
+        metrics.record_request(RequestMetrics(endpoint="/api", status_code=500, latency_ms=30.0))
+        clock.advance(2 * 60 * 1000)
+        metrics.record_request(RequestMetrics(endpoint="/api", status_code=200, latency_ms=10.0))
+
+        windows = metrics.snapshot().windows
+        assert windows.one_minute == WindowedStats(requests=1, errors=0, avg_latency_ms=10.0)
+        assert windows.five_minutes == WindowedStats(
+            requests=2, errors=1, avg_latency_ms=20.0, error_rate=50.0
+        )
+
+        clock.advance(60 * 60 * 1000)
+        assert metrics.snapshot().windows.one_hour.requests == 0
+
+        # The ring slot from an hour ago is reused, not accumulated into
+        metrics.record_request(RequestMetrics(endpoint="/api", status_code=200, latency_ms=5.0))
+        assert metrics.snapshot().windows.one_hour.requests == 1
@@ -46,6 +46,15 @@ class TestCalculateBackoff:
         delay = calculate_backoff(10, config)  # Would be 102400ms without cap
         assert delay == pytest.approx(0.5, rel=0.01)
 
+    def test_table_follows_config_changes(self):
+        """Delays track config edits and attempts past the precomputed table."""
+        config = RetryConfig(base_delay_ms=100, max_delay_ms=10000, jitter_factor=0)
+        assert calculate_backoff(3, config) == pytest.approx(0.8)
+
+        config.base_delay_ms = 50
+        assert calculate_backoff(3, config) == pytest.approx(0.4)
+        assert calculate_backoff(64, config) == pytest.approx(10.0)
+
     def test_jitter_adds_variance(self):
         """Jitter should add variance to delays."""
         config = RetryConfig(
@@ -95,6 +104,11 @@ class TestIsRetryableError:
         assert not is_retryable_error(Exception("400 Bad Request"))
         assert not is_retryable_error(Exception("404 Not Found"))
 
+    def test_retryable_token_wins_over_client_code(self):
+        """A retryable indicator anywhere in the message makes the error retryable."""
+        assert is_retryable_error(Exception("404 from upstream after connection reset"))
+        assert not is_retryable_error(Exception("unexpected failure"))
+
     def test_rollgate_error_uses_retryable_flag(self):
         """RollgateError should use its retryable flag."""
         retryable = RollgateError("test", retryable=True)
@@ -103,6 +117,12 @@ class TestIsRetryableError:
         assert is_retryable_error(retryable)
         assert not is_retryable_error(not_retryable)
 
+    def test_typed_flag_beats_message(self):
+        """A typed retryable flag is trusted over the message text."""
+        assert not RollgateError("connection refused").retryable
+        assert not is_retryable_error(RollgateError("connection refused"))
+        assert is_retryable_error(NetworkError(""))
+
 
 class TestFetchWithRetry:
     """Tests for fetch_with_retry function."""
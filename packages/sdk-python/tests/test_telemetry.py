@@ -0,0 +1,249 @@
+"""Tests for telemetry collection."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+import pytest_asyncio
+
+from rollgate import RollgateClient, RollgateConfig
+from rollgate.telemetry import (
+    BackpressureStrategy,
+    TelemetryCollector,
+    TelemetryConfig,
+    build_telemetry_client,
+)
+
+pytestmark = pytest.mark.asyncio(loop_scope="module")
+
+
+@pytest_asyncio.fixture(loop_scope="module")
+async def mock_client():
+    """Build httpx clients on a mock transport, closing them after the test."""
+    clients = []
+
+    def build(handler):
+        client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        clients.append(client)
+        return client
+
+    yield build
+    for client in clients:
+        await client.aclose()
+
+
+def make_collector(mock_client, strategy=BackpressureStrategy.DROP_OLDEST):
+    """Create a collector whose endpoint always fails.
+
+    Each failed POST records 4 evaluations of a new flag, simulating traffic
+    that keeps arriving while the server is down.
+    """
+    calls = 0
+
+    def handler(request):
+        nonlocal calls
+        calls += 1
+        for _ in range(4):
+            collector.record_evaluation(f"during-flush-{calls}", True)
+        return httpx.Response(500)
+
+    collector = TelemetryCollector(
+        endpoint="https://api.rollgate.io/api/v1/sdk/telemetry",
+        api_key="test-api-key",
+        config=TelemetryConfig(max_buffer_size=5, backpressure_strategy=strategy),
+        http_client=mock_client(handler),
+    )
+    return collector
+
+
+class TestTelemetryBackpressure:
+    """Tests for buffer restore on flush failure."""
+
+    async def test_restores_batch_under_watermark(self, mock_client):
+        """A failed batch is merged back while the buffer stays under 2x max."""
+        collector = make_collector(mock_client)
+        for _ in range(4):
+            collector.record_evaluation("flag-a", True)
+
+        await collector.flush()
+
+        assert collector.get_buffer_stats() == {"flagCount": 2, "evaluationCount": 8}
+
+    @pytest.mark.parametrize(
+        "strategy,expected",
+        [
+            (BackpressureStrategy.DROP_OLDEST, {"flagCount": 1, "evaluationCount": 4}),
+            (BackpressureStrategy.DROP_NEWEST, {"flagCount": 2, "evaluationCount": 8}),
+            (BackpressureStrategy.SAMPLE, {"flagCount": 3, "evaluationCount": 10}),
+        ],
+    )
+    async def test_strategy_over_watermark(self, mock_client, strategy, expected):
+        """Sustained failures never grow the buffer past the high watermark."""
+        collector = make_collector(mock_client, strategy)
+        for _ in range(4):
+            collector.record_evaluation("flag-a", True)
+
+        await collector.flush()  # 4 restored + 4 recorded = 8
+        await collector.flush()  # 8 failed + 4 recorded = 12 > 10
+
+        assert collector.get_buffer_stats() == expected
+
+    async def test_sample_logs_evaluations_actually_dropped(self, mock_client, caplog):
+        """SAMPLE reports the evaluations lost to per-flag truncation too."""
+        collector = make_collector(mock_client, BackpressureStrategy.SAMPLE)
+        for key in ("flag-a", "flag-b"):
+            for _ in range(3):
+                collector.record_evaluation(key, True)
+
+        await collector.flush()  # 6 restored + 4 recorded = 10
+        await collector.flush()  # 10 failed sampled at 0.6: 1 + 1 + 2 kept
+
+        assert collector.get_buffer_stats()["evaluationCount"] == 8
+        assert "Dropping 6 telemetry evaluations" in caplog.text
+
+
+class TestTelemetryFlushing:
+    """Tests for background flushing."""
+
+    async def test_flush_payload(self, mock_client):
+        """Flush posts per-flag true/false counts as JSON."""
+        bodies = []
+
+        def handler(request):
+            bodies.append(json.loads(request.content))
+            return httpx.Response(200)
+
+        collector = TelemetryCollector(
+            endpoint="https://api.rollgate.io/api/v1/sdk/telemetry",
+            api_key="test-api-key",
+            config=TelemetryConfig(),
+            http_client=mock_client(handler),
+        )
+        collector.record_evaluation("flag-a", True)
+        collector.record_evaluation("flag-a", False)
+        collector.record_evaluation("flag-b", True)
+
+        await collector.flush()
+
+        assert bodies == [{
+            "evaluations": {
+                "flag-a": {"total": 2, "true": 1, "false": 1},
+                "flag-b": {"total": 1, "true": 1, "false": 0},
+            },
+            "period_ms": 0,
+        }]
+
+    async def test_full_buffer_wakes_periodic_flusher(self, mock_client):
+        """Reaching max_buffer_size flushes without waiting for the interval."""
+        posted = asyncio.Event()
+
+        def handler(request):
+            posted.set()
+            return httpx.Response(200)
+
+        collector = TelemetryCollector(
+            endpoint="https://api.rollgate.io/api/v1/sdk/telemetry",
+            api_key="test-api-key",
+            config=TelemetryConfig(flush_interval_ms=60000, max_buffer_size=5),
+            http_client=mock_client(handler),
+        )
+        collector.start()
+
+        for _ in range(5):
+            collector.record_evaluation("flag-a", True)
+
+        await asyncio.wait_for(posted.wait(), timeout=1)
+        assert collector.get_buffer_stats()["evaluationCount"] == 0
+        await collector.stop()
+
+    async def test_full_buffer_flushes_before_start(self, mock_client):
+        """Reaching max_buffer_size flushes even if start() was never called."""
+        posted = asyncio.Event()
+        posts = 0
+
+        def handler(request):
+            nonlocal posts
+            posts += 1
+            posted.set()
+            return httpx.Response(200)
+
+        collector = TelemetryCollector(
+            endpoint="https://api.rollgate.io/api/v1/sdk/telemetry",
+            api_key="test-api-key",
+            config=TelemetryConfig(max_buffer_size=5),
+            http_client=mock_client(handler),
+        )
+
+        for _ in range(8):
+            collector.record_evaluation("flag-a", True)
+
+        await asyncio.wait_for(posted.wait(), timeout=1)
+        assert posts == 1
+        assert collector.get_buffer_stats()["evaluationCount"] == 0
+        await collector.stop()
+
+
+def flags_transport():
+    """Mock transport serving an empty flag set and accepting telemetry posts."""
+
+    def handler(request):
+        if request.url.path.endswith("/flags"):
+            return httpx.Response(200, json={"flags": {}})
+        return httpx.Response(200)
+
+    return httpx.MockTransport(handler)
+
+
+class TestTelemetryHttpClient:
+    """Tests for the HTTP client telemetry flushes go through."""
+
+    async def test_build_telemetry_client(self):
+        """The built client uses the given timeout and transport."""
+        client = build_telemetry_client(2.5, transport=flags_transport())
+        try:
+            assert client.timeout == httpx.Timeout(2.5)
+            response = await client.post("https://api.rollgate.io/api/v1/sdk/telemetry")
+            assert response.status_code == 200
+        finally:
+            await client.aclose()
+
+    async def test_client_builds_telemetry_client_on_init(self):
+        """An owned telemetry client is only opened once init() runs, and closed with the client."""
+        client = RollgateClient(
+            RollgateConfig(
+                api_key="test-api-key",
+                base_url="https://api.rollgate.io",
+                refresh_interval_ms=0,
+                transport=flags_transport(),
+            )
+        )
+        assert client._telemetry_http_client is None
+
+        await client.init()
+        telemetry_client = client._telemetry_http_client
+        assert telemetry_client is not None
+        assert client._telemetry_collector._http_client is telemetry_client
+
+        await client.close()
+        assert telemetry_client.is_closed
+
+    async def test_client_reuses_injected_client(self):
+        """A caller-supplied client is used for telemetry instead of a dedicated one."""
+        injected = httpx.AsyncClient(transport=flags_transport())
+        client = RollgateClient(
+            RollgateConfig(
+                api_key="test-api-key",
+                base_url="https://api.rollgate.io",
+                refresh_interval_ms=0,
+            ),
+            http_client=injected,
+        )
+        try:
+            await client.init()
+            assert client._telemetry_http_client is None
+            assert client._telemetry_collector._http_client is injected
+            await client.close()
+            assert not injected.is_closed
+        finally:
+            await injected.aclose()
@@ -1,10 +1,17 @@
 """Tests for W3C Trace Context support."""
 
+import base64
+import dataclasses
+import re
+import threading
+
+import httpx
 import pytest
 from rollgate.tracing import (
     TraceContext,
     RequestTrace,
     TracingManager,
+    current_context,
     generate_trace_id,
     generate_span_id,
     generate_request_id,
@@ -17,6 +24,18 @@ from rollgate.tracing import (
 )
 
 
+LOWER_HEX = re.compile(r"[0-9a-f]+")
+CROCKFORD = re.compile(r"[0-9A-HJKMNP-TV-Z]+")
+FROM_CROCKFORD = str.maketrans(
+    "0123456789ABCDEFGHJKMNPQRSTVWXYZ", "ABCDEFGHIJKLMNOPQRSTUVWXYZ234567"
+)
+
+
+def is_lower_hex(value):
+    """True for a non-empty lowercase hex string (one regex match, no char loop)."""
+    return LOWER_HEX.fullmatch(value) is not None
+
+
 class TestTraceContext:
     """Tests for TraceContext class."""
 
@@ -24,19 +43,38 @@ class TestTraceContext:
         """Test trace ID generation."""
         trace_id = generate_trace_id()
         assert len(trace_id) == 32
-        assert all(c in "0123456789abcdef" for c in trace_id)
+        assert is_lower_hex(trace_id)
 
     def test_generate_span_id(self):
         """Test span ID generation."""
         span_id = generate_span_id()
         assert len(span_id) == 16
-        assert all(c in "0123456789abcdef" for c in span_id)
+        assert is_lower_hex(span_id)
 
     def test_generate_request_id(self):
         """Test request ID generation."""
         request_id = generate_request_id()
         assert request_id.startswith("req_")
         assert len(request_id) == 28  # "req_" + 24 hex chars
+        assert is_lower_hex(request_id[4:])
+
+    def test_generate_request_id_base32(self):
+        """Test Crockford base32 request IDs carry the same 12 bytes in 20 chars."""
+        tracer = TracingManager(request_id_encoding="base32")
+
+        for request_id in (generate_request_id("base32"), tracer.create_context().request_id):
+            assert request_id.startswith("req_")
+            assert len(request_id) == 24  # "req_" + 20 base32 chars
+            assert CROCKFORD.fullmatch(request_id[4:])
+            rfc4648 = request_id[4:].translate(FROM_CROCKFORD) + "===="
+            assert len(base64.b32decode(rfc4648)) == 12
+
+    def test_unknown_request_id_encoding(self):
+        """Test unknown request ID encodings are rejected up front."""
+        with pytest.raises(ValueError, match="b64"):
+            TracingManager(request_id_encoding="b64")
+        with pytest.raises(ValueError):
+            generate_request_id("HEX")
 
     def test_default_context(self):
         """Test default context creation."""
@@ -47,6 +85,15 @@ class TestTraceContext:
         assert ctx.request_id.startswith("req_")
         assert ctx.sampled is True
 
+    def test_missing_ids_are_generated(self):
+        """Test only the ids that were not supplied get generated."""
+        ctx = TraceContext(trace_id="a" * 32, request_id="req_given")
+
+        assert ctx.trace_id == "a" * 32
+        assert ctx.request_id == "req_given"
+        assert len(ctx.span_id) == 16
+        assert is_lower_hex(ctx.span_id)
+
     def test_get_headers(self):
         """Test header generation."""
         ctx = TraceContext(
@@ -62,6 +109,30 @@ class TestTraceContext:
         assert headers[HEADER_SPAN_ID] == "b" * 16
         assert HEADER_REQUEST_ID in headers
 
+    def test_get_headers_returns_copy(self):
+        """Test callers can modify returned headers without affecting the context."""
+        ctx = TraceContext(trace_id="a" * 32, span_id="b" * 16)
+
+        headers = ctx.get_headers()
+        headers[HEADER_TRACE_ID] = "changed"
+
+        assert ctx.get_headers()[HEADER_TRACE_ID] == "a" * 32
+
+    def test_fields_cannot_drift_from_headers(self):
+        """Test contexts are immutable and replace() rebuilds the headers."""
+        ctx = TraceContext()
+
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            ctx.sampled = False
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            ctx.trace_id = "c" * 32
+
+        variant = dataclasses.replace(ctx, sampled=False, trace_id="c" * 32)
+        headers = variant.get_headers()
+        assert headers[HEADER_TRACEPARENT] == f"00-{'c' * 32}-{ctx.span_id}-00"
+        assert headers[HEADER_TRACE_ID] == "c" * 32
+        assert ctx.get_headers()[HEADER_TRACEPARENT].endswith("-01")
+
     def test_get_headers_not_sampled(self):
         """Test header generation for non-sampled traces."""
         ctx = TraceContext(
@@ -87,6 +158,23 @@ class TestTraceContext:
         assert child.parent_id == parent.span_id
         assert child.request_id == parent.request_id
 
+    def test_create_child_headers(self):
+        """Test a child's headers match a context built from its fields."""
+        parent = TraceContext(sampled=False)
+
+        child = parent.create_child()
+        rebuilt = TraceContext(
+            trace_id=child.trace_id,
+            span_id=child.span_id,
+            parent_id=child.parent_id,
+            request_id=child.request_id,
+            sampled=child.sampled,
+        )
+
+        assert child == rebuilt
+        assert child.get_headers() == rebuilt.get_headers()
+        assert parent.get_headers()[HEADER_SPAN_ID] == parent.span_id
+
     def test_from_traceparent(self):
         """Test parsing traceparent header."""
         traceparent = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
@@ -107,6 +195,15 @@ class TestTraceContext:
         assert ctx is not None
         assert ctx.sampled is False
 
+    def test_from_traceparent_uppercase(self):
+        """Test uppercase hex is accepted and normalized."""
+        ctx = TraceContext.from_traceparent(
+            "00-4BF92F3577B34DA6A3CE929D0E0E4736-00F067AA0BA902B7-01"
+        )
+
+        assert ctx is not None
+        assert ctx.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+
     def test_from_traceparent_invalid(self):
         """Test parsing invalid traceparent returns None."""
         invalid_values = [
@@ -114,6 +211,7 @@ class TestTraceContext:
             "invalid",
             "00-short-00f067aa0ba902b7-01",
             "01-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01",  # Wrong version
+            "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01\n",  # Trailing newline
         ]
 
         for value in invalid_values:
@@ -146,6 +244,32 @@ class TestTraceContext:
         assert ctx.trace_id == "a" * 32
         assert ctx.request_id == "req_custom"
 
+    def test_from_headers_case_insensitive(self):
+        """Test header lookup ignores the casing of header names."""
+        traceparent = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+        for headers in (
+            {"Traceparent": traceparent, "X-Request-Id": "req_title"},
+            {"TRACEPARENT": traceparent, "X-REQUEST-ID": "req_title"},
+            httpx.Headers({"TraceParent": traceparent, "X-Request-ID": "req_title"}),
+        ):
+            ctx = TraceContext.from_headers(headers)
+            assert ctx is not None
+            assert ctx.trace_id == "4bf92f3577b34da6a3ce929d0e0e4736"
+            assert ctx.request_id == "req_title"
+
+    def test_from_headers_assume_lower(self):
+        """Test assume_lower looks names up as given, without normalizing."""
+        traceparent = "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"
+
+        ctx = TraceContext.from_headers(
+            {"traceparent": traceparent, "x-request-id": "req_asgi"}, assume_lower=True
+        )
+        assert ctx is not None
+        assert ctx.request_id == "req_asgi"
+
+        assert TraceContext.from_headers({"Traceparent": traceparent}, assume_lower=True) is None
+
     def test_from_headers_empty(self):
         """Test extracting context from empty headers."""
         ctx = TraceContext.from_headers({})
@@ -158,16 +282,26 @@ class TestRequestTrace:
     def test_timing(self):
         """Test request timing."""
         ctx = TraceContext()
-        trace = RequestTrace(context=ctx, endpoint="/api/v1/flags")
+        clock = iter([0, 10_000_000]).__next__
+        trace = RequestTrace(context=ctx, endpoint="/api/v1/flags", time_source=clock)
+
+        trace.start()
+        trace.finish(200)
+
+        assert trace.latency_ms == 10
+        assert trace.end_time == pytest.approx(trace.start_time + 0.01)
+
+    def test_latency_ignores_wall_clock_jumps(self, monkeypatch):
+        """Test latency is measured on the monotonic clock."""
+        import rollgate.tracing as tracing_module
 
+        trace = RequestTrace(context=TraceContext(), endpoint="/api")
         trace.start()
-        # Simulate some work
-        import time
-        time.sleep(0.01)
+        monkeypatch.setattr(tracing_module.time, "time", lambda: 0.0)
         trace.finish(200)
 
-        assert trace.latency_ms > 0
-        assert trace.latency_ms < 100  # Should be ~10ms
+        assert trace.latency_ms >= 0
+        assert trace.end_time >= trace.start_time
 
     def test_success(self):
         """Test success detection."""
@@ -230,6 +364,21 @@ class TestTracingManager:
         assert HEADER_TRACEPARENT in headers
         assert HEADER_TRACE_ID in headers
 
+    def test_inject_headers_into(self):
+        """Test in-place header injection."""
+        tracer = TracingManager()
+        ctx = TraceContext(trace_id="a" * 32, span_id="b" * 16)
+        headers = {"existing": "value"}
+
+        tracer.inject_headers_into(headers, ctx)
+
+        assert headers == {"existing": "value", **ctx.get_headers()}
+
+        disabled = TracingManager(enabled=False)
+        untouched = {"existing": "value"}
+        disabled.inject_headers_into(untouched, ctx)
+        assert untouched == {"existing": "value"}
+
     def test_trace_request_context_manager(self):
         """Test trace_request context manager."""
         tracer = TracingManager()
@@ -241,6 +390,30 @@ class TestTracingManager:
         assert len(traces) == 1
         assert traces[0].endpoint == "/api/v1/flags"
 
+    def test_trace_request_sets_current_context(self):
+        """Test headers injected inside trace_request use its context."""
+        tracer = TracingManager()
+        assert current_context() is None
+
+        with tracer.trace_request("/api/v1/flags") as trace:
+            assert current_context() is trace.context
+            headers = tracer.inject_headers({})
+            assert headers[HEADER_SPAN_ID] == trace.context.span_id
+            trace.finish(200)
+
+        assert current_context() is None
+
+    def test_trace_request_propagates_errors(self):
+        """Test exceptions escape trace_request and still record the trace."""
+        tracer = TracingManager()
+
+        with pytest.raises(RuntimeError), tracer.trace_request("/api/v1/flags") as trace:
+            trace.finish(0, error="boom")
+            raise RuntimeError("boom")
+
+        assert current_context() is None
+        assert tracer.get_recent_traces() == [trace]
+
     def test_disabled_tracer(self):
         """Test disabled tracer."""
         tracer = TracingManager(enabled=False)
@@ -251,6 +424,23 @@ class TestTracingManager:
         headers = tracer.inject_headers({"existing": "value"})
         assert headers == {"existing": "value"}
 
+        headers = {"existing": "value"}
+        tracer.inject_headers_into(headers)
+        assert headers == {"existing": "value"}
+
+    def test_toggle_enabled(self):
+        """Test toggling enabled updates the disabled fast path."""
+        tracer = TracingManager(enabled=False)
+        headers = {"existing": "value"}
+        assert tracer.inject_headers(headers) is headers
+
+        tracer.enabled = True
+        assert HEADER_TRACEPARENT in tracer.inject_headers(headers)
+
+        tracer.enabled = False
+        assert tracer.inject_headers(headers) is headers
+        assert tracer.extract_context({HEADER_TRACE_ID: "a" * 32}) is None
+
     def test_sample_rate(self):
         """Test sample rate."""
         tracer = TracingManager(enabled=True, sample_rate=0.0)
@@ -262,6 +452,21 @@ class TestTracingManager:
         ctx2 = tracer2.create_context()
         assert ctx2.sampled is True
 
+    def test_sample_rate_bounds_skip_rng(self, monkeypatch):
+        """Test rates of 0 and 1 never draw a random number."""
+        import rollgate.tracing as tracing_module
+
+        def fail():
+            raise AssertionError("random draw for a fixed sample rate")
+
+        monkeypatch.setattr(tracing_module, "_random", fail)
+        assert TracingManager(sample_rate=1.0).create_context().sampled is True
+        assert TracingManager(sample_rate=0.0).create_context().sampled is False
+
+        monkeypatch.setattr(tracing_module, "_random", lambda: 0.3)
+        assert TracingManager(sample_rate=0.25).create_context().sampled is False
+        assert TracingManager(sample_rate=0.35).create_context().sampled is True
+
     def test_get_stats(self):
         """Test statistics."""
         tracer = TracingManager()
@@ -276,6 +481,55 @@ class TestTracingManager:
         assert stats["trace_count"] == 2
         assert stats["error_rate"] == 0.5
 
+    def test_stats_follow_evicted_traces(self):
+        """Test running stats drop traces that fall out of the window."""
+        tracer = TracingManager()
+
+        for status in [500] * 5 + [200] * 1000:
+            with tracer.trace_request("/api") as trace:
+                trace.finish(status)
+
+        stats = tracer.get_stats()
+        assert stats["trace_count"] == 1000
+        assert stats["error_rate"] == 0
+        assert len(tracer.get_recent_traces(limit=10)) == 10
+
+    def test_stats_ignore_refinished_traces(self):
+        """Test finishing a retained trace again does not skew the totals."""
+        tracer = TracingManager()
+
+        with tracer.trace_request("/api") as first:
+            first.finish(200)
+        first.finish(500)  # now failed, with a longer latency
+        for _ in range(1000):  # evicts the first trace
+            with tracer.trace_request("/api") as trace:
+                trace.finish(200)
+
+        stats = tracer.get_stats()
+        assert stats["trace_count"] == 1000
+        assert stats["error_rate"] == 0
+        assert stats["avg_latency_ms"] >= 0
+
+    def test_stats_consistent_across_threads(self):
+        """Test concurrent recording keeps totals in step with retained traces."""
+        tracer = TracingManager()
+
+        def worker(status):
+            for _ in range(500):
+                with tracer.trace_request("/api") as trace:
+                    trace.finish(status)
+
+        threads = [threading.Thread(target=worker, args=(s,)) for s in (200, 500) * 4]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        retained = tracer.get_recent_traces(limit=1000)
+        stats = tracer.get_stats()
+        assert stats["trace_count"] == len(retained) == 1000
+        assert stats["error_rate"] == sum(not t.success for t in retained) / 1000
+
     def test_clear_traces(self):
         """Test clearing traces."""
         tracer = TracingManager()
@@ -285,6 +539,7 @@ class TestTracingManager:
 
         tracer.clear_traces()
         assert len(tracer.get_recent_traces()) == 0
+        assert tracer.get_stats()["trace_count"] == 0
 
     def test_global_tracer(self):
         """Test global tracer instance."""